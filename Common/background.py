@@ -0,0 +1,28 @@
+import queue
+import threading
+
+POLL_MS = 50  # How often the Tk thread checks whether the worker has finished
+
+
+# Run work() on a daemon thread and hand its result to on_done, or its exception to on_error,
+# on the Tk thread. Widgets may only be touched from the thread running mainloop, so the worker
+# only puts its outcome on a queue, which the Tk thread polls with after().
+def run_in_background(root, work, on_done, on_error, poll_ms=POLL_MS):
+    results = queue.Queue(maxsize=1)
+
+    def worker():
+        try:
+            results.put((True, work()))
+        except Exception as e:
+            results.put((False, e))
+
+    def poll():
+        try:
+            succeeded, value = results.get_nowait()
+        except queue.Empty:
+            root.after(poll_ms, poll)
+            return
+        (on_done if succeeded else on_error)(value)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(poll_ms, poll)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# Standard candle intervals in nanoseconds, used to name an inferred interval
+STANDARD_INTERVALS_NS = {
+    "1m": 60 * 10**9,
+    "3m": 3 * 60 * 10**9,
+    "5m": 5 * 60 * 10**9,
+    "15m": 15 * 60 * 10**9,
+    "30m": 30 * 60 * 10**9,
+    "1h": 60 * 60 * 10**9,
+    "2h": 2 * 60 * 60 * 10**9,
+    "4h": 4 * 60 * 60 * 10**9,
+    "6h": 6 * 60 * 60 * 10**9,
+    "8h": 8 * 60 * 60 * 10**9,
+    "12h": 12 * 60 * 60 * 10**9,
+    "1d": 24 * 60 * 60 * 10**9,
+    "3d": 3 * 24 * 60 * 60 * 10**9,
+    "1w": 7 * 24 * 60 * 60 * 10**9,
+}
+
+
+# Candle times (any datetime-like) as a sorted, de-duplicated int64 nanosecond array
+def time_array(times):
+    values = pd.to_datetime(pd.Series(times), errors='coerce').dropna().to_numpy(dtype='datetime64[ns]').astype('int64')
+    return np.unique(values)
+
+# The interval of a series is its most common spacing, not its smallest: a single short
+# step or hundreds of missing bars cannot move the mode. Returns 0 for fewer than two times.
+def infer_interval_ns(times_ns):
+    diffs = np.diff(np.sort(times_ns))
+    diffs = np.sort(diffs[diffs > 0])
+    if diffs.size == 0:
+        return 0
+    # Run lengths of the sorted spacings; plain sorts stay fast on multi-million-row 1m series
+    starts = np.flatnonzero(np.concatenate(([True], diffs[1:] != diffs[:-1])))
+    counts = np.diff(np.append(starts, diffs.size))
+    return int(diffs[starts[np.argmax(counts)]])
+
+def interval_label(interval_ns):
+    for label, ns in STANDARD_INTERVALS_NS.items():
+        if ns == interval_ns:
+            return label
+    return str(pd.Timedelta(interval_ns, unit='ns')) if interval_ns else "Unknown"
+
+# Gaps in a sorted int64 time array: (positions after which bars are missing, number of missing bars)
+def find_gaps(sorted_times_ns, interval_ns):
+    diffs = np.diff(sorted_times_ns)
+    if interval_ns == 0:
+        return np.array([], dtype=np.int64), 0
+    positions = np.flatnonzero(diffs > interval_ns)
+    return positions, int((diffs[positions] // interval_ns - 1).sum())
+
+# Reindex onto a complete regular grid from the first to the last candle and forward-fill
+# the missing bars from the last known one. Duplicate times keep their last row.
+def fill_gaps(df, time_column, interval_ns=None):
+    times = pd.to_datetime(df[time_column], errors='coerce')
+    df = df.assign(**{time_column: times}).dropna(subset=[time_column])
+    df = df.iloc[np.argsort(df[time_column].to_numpy(dtype='datetime64[ns]'), kind='stable')]
+    df = df.drop_duplicates(subset=[time_column], keep='last').reset_index(drop=True)
+
+    times_ns = df[time_column].to_numpy(dtype='datetime64[ns]').astype('int64')
+    interval_ns = interval_ns or infer_interval_ns(times_ns)
+    if interval_ns == 0:
+        return df
+
+    # Every grid point takes the last row at or before it, which is exactly a forward fill.
+    # The grid is built from integer steps: np.arange sizes it in floating point and can drop the last bar.
+    grid = times_ns[0] + interval_ns * np.arange((times_ns[-1] - times_ns[0]) // interval_ns + 1, dtype=np.int64)
+    source_rows = np.searchsorted(times_ns, grid, side='right') - 1
+    filled = df.iloc[source_rows].reset_index(drop=True)
+    filled[time_column] = grid.view('datetime64[ns]')
+    return filled
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+import requests
+
+# Binance USDT-M futures request weight allowed per IP per minute
+BINANCE_WEIGHT_PER_MINUTE = 2400
+
+# OKX per-endpoint limits as (requests, seconds), per IP
+OKX_ENDPOINT_LIMITS = {
+    "/api/v5/rubik/stat/contracts/open-interest-history": (5, 2),
+    "/api/v5/market/candles": (40, 2),
+    "/api/v5/market/history-candles": (20, 2),
+    "/api/v5/public/open-interest": (20, 2),
+    "/api/v5/public/time": (10, 2),
+}
+OKX_RETRIES = 5  # Attempts per OKX request before a caller gives up on it
+OKX_TIMEOUT = 10  # Seconds before an OKX request counts as failed
+
+
+# Thread-safe token bucket, one instance is shared by every worker hitting the same limit
+class TokenBucket:
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period  # Tokens refilled per second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Take `tokens` if available, otherwise return how long to wait before retrying
+    def _try_take(self, tokens):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self.blocked_until - now
+            if wait <= 0:
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return 0
+                wait = (tokens - self.tokens) / self.rate
+            return wait
+
+    # Block until `tokens` are available, then take them
+    def acquire(self, tokens=1):
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    # Same as acquire() for coroutines, without blocking the event loop
+    async def acquire_async(self, tokens=1):
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    # Lower the local budget to what the server reports as still available
+    def sync_remaining(self, remaining):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, max(remaining, 0))
+
+    # Stop every worker for `seconds`, e.g. after a 429 with Retry-After
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+# Token bucket kept in step with Binance's X-MBX-USED-WEIGHT-1m header
+class BinanceWeightLimiter(TokenBucket):
+    def __init__(self, weight_per_minute=BINANCE_WEIGHT_PER_MINUTE, headroom=0.1):
+        # Keep some headroom for other clients sharing the same IP
+        self.weight_limit = int(weight_per_minute * (1 - headroom))
+        super().__init__(self.weight_limit, 60)
+
+    # Update the budget from a response; works with requests and aiohttp headers
+    def update(self, status, headers):
+        used = headers.get("X-MBX-USED-WEIGHT-1m") or headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is not None:
+            self.sync_remaining(self.weight_limit - int(used))
+
+        # 429 = rate limited, 418 = IP banned after ignoring 429s
+        if status in (429, 418):
+            retry_after = headers.get("Retry-After")
+            self.pause(int(retry_after) if retry_after else 60)
+
+
+# Request weight of GET /fapi/v1/klines for a given limit
+def binance_kline_weight(limit):
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+binance_limiter = BinanceWeightLimiter()
+
+_okx_limiters = {}
+_okx_limiters_lock = threading.Lock()
+
+
+# Shared limiter for an OKX REST endpoint, created on first use
+def okx_limiter(endpoint):
+    with _okx_limiters_lock:
+        if endpoint not in _okx_limiters:
+            requests_allowed, seconds = OKX_ENDPOINT_LIMITS.get(endpoint, (10, 2))
+            _okx_limiters[endpoint] = TokenBucket(requests_allowed, seconds)
+        return _okx_limiters[endpoint]
+
+
+# Update an OKX endpoint limiter after a response. Returns True if the request was throttled:
+# the response holds no data, so the caller must acquire again and resend the same request.
+def okx_update(endpoint, status):
+    # OKX answers 429 (code 50011) when the endpoint limit is exceeded
+    if status == 429:
+        requests_allowed, seconds = OKX_ENDPOINT_LIMITS.get(endpoint, (10, 2))
+        okx_limiter(endpoint).pause(seconds)
+        return True
+    return False
+
+
+# GET an OKX endpoint through its shared limiter. A throttled (429) or server-error response,
+# a connection error or a timeout is retried, up to OKX_RETRIES attempts; the limiter's pause
+# paces the retries after a 429. Returns the last response, or None if none ever arrived.
+def okx_get(url, endpoint, params=None, session=requests, timeout=OKX_TIMEOUT):
+    response = None
+    for attempt in range(OKX_RETRIES):
+        okx_limiter(endpoint).acquire()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"Error requesting {endpoint}: {e}. Retrying in {2 ** attempt} seconds...")
+            time.sleep(2 ** attempt)
+            continue
+        if not okx_update(endpoint, response.status_code) and response.status_code < 500:
+            return response
+    return response
@@ -0,0 +1,207 @@
+import os
+import glob
+import shutil
+import pandas as pd
+
+
+# Parse a stored time value; daily CSVs hold dates only, intraday CSVs a time part as well
+def _parse_time(value):
+    return pd.Timestamp(value).to_pydatetime()
+
+
+# Last `count` data lines of a CSV, oldest first, read from the end of the file without
+# parsing the rest. The header, recognised by its first column name, is never returned.
+def tail_lines(file_path, count=1, header_start="Open Time"):
+    with open(file_path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        block = b""
+        # Walk backwards until the block holds `count` lines after its (possibly partial) first one
+        while position > 0 and block.count(b"\n") < count + 1:
+            step = min(4096, position)
+            position -= step
+            file.seek(position)
+            block = file.read(step) + block
+
+    lines = block.decode(errors='replace').splitlines()
+    if position > 0:
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip() and not line.startswith(header_start)]
+    return lines[-count:]
+
+
+# CSV files named {symbol}_{interval}_{start}_to_{end}.csv, the layout of Correct_Price_Data/
+class CsvStorage:
+    extension = ".csv"
+
+    def __init__(self, root=".", time_column="Open Time"):
+        self.root = root
+        self.time_column = time_column
+
+    def path_for(self, symbol, interval):
+        matches = sorted(glob.glob(os.path.join(self.root, f"{symbol}_{interval}_*_to_*.csv")))
+        return matches[-1] if matches else None
+
+    # Write a full series, replacing any file with the same name
+    def write(self, df, symbol, interval, start_date, end_date):
+        os.makedirs(self.root, exist_ok=True)
+        file_name = os.path.join(self.root, f"{symbol}_{interval}_{start_date.strftime('%Y%m%d')}_to_{end_date.strftime('%Y%m%d')}.csv")
+        df.to_csv(file_name, index=False)
+        return file_name
+
+    # Append rows to the stored series and roll the end date in the file name forward
+    def append(self, df, symbol, interval, end_date):
+        file_path = self.path_for(symbol, interval)
+        last_line = self._last_line(file_path)
+        # Match the existing file, pandas writes midnight-only columns as plain dates
+        date_format = '%Y-%m-%d %H:%M:%S' if last_line is None or " " in last_line.split(",")[0] else '%Y-%m-%d'
+        df.to_csv(file_path, mode='a', header=False, index=False, date_format=date_format)
+
+        name_start = os.path.basename(file_path).split("_to_")[0]
+        new_path = os.path.join(os.path.dirname(file_path), f"{name_start}_to_{end_date.strftime('%Y%m%d')}.csv")
+        if new_path != file_path:
+            os.replace(file_path, new_path)
+        return new_path
+
+    # Last stored time (the high-water mark), read from the file tail without parsing the whole file
+    def last_timestamp(self, symbol, interval):
+        file_path = self.path_for(symbol, interval)
+        if file_path is None:
+            return None
+        last_line = self._last_line(file_path)
+        if last_line is None:
+            return None
+        return _parse_time(last_line.split(",")[0])
+
+    def read(self, symbol, interval):
+        file_path = self.path_for(symbol, interval)
+        if file_path is None:
+            return None
+        return pd.read_csv(file_path, parse_dates=[self.time_column])
+
+    def _last_line(self, file_path):
+        lines = tail_lines(file_path, 1, self.time_column)
+        return lines[-1] if lines else None
+
+
+# Typed, compressed Parquet or Arrow IPC (Feather) files partitioned as
+# {root}/symbol={symbol}/interval={interval}/month={YYYY-MM}/part-0.{parquet|feather}
+class ColumnarStorage:
+    def __init__(self, root=".", time_column="Open Time", file_format="parquet", compression="zstd"):
+        # Imported here so CSV-only users do not need pyarrow installed
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        self.pa = pyarrow
+        self.dataset = pyarrow.dataset
+        self.feather = pyarrow.feather
+        self.parquet = pyarrow.parquet
+        self.root = root
+        self.time_column = time_column
+        self.file_format = file_format
+        self.compression = compression
+        self.extension = ".parquet" if file_format == "parquet" else ".feather"
+
+    def series_dir(self, symbol, interval):
+        return os.path.join(self.root, f"symbol={symbol}", f"interval={interval}")
+
+    # Write a full series, replacing whatever was stored for it
+    def write(self, df, symbol, interval, start_date=None, end_date=None):
+        series_dir = self.series_dir(symbol, interval)
+        if os.path.isdir(series_dir):
+            shutil.rmtree(series_dir)
+        self._write_months(self._typed(df), series_dir, merge=False)
+        return series_dir
+
+    # Merge rows into the monthly partitions they fall in, newest value wins per timestamp
+    def append(self, df, symbol, interval, end_date=None):
+        series_dir = self.series_dir(symbol, interval)
+        self._write_months(self._typed(df), series_dir, merge=True)
+        return series_dir
+
+    def last_timestamp(self, symbol, interval):
+        files = self._files(symbol, interval)
+        if not files:
+            return None
+        table = self._read_file(files[-1], columns=[self.time_column])
+        if table.num_rows == 0:
+            return None
+        return pd.Timestamp(table.column(self.time_column).to_pandas().max()).to_pydatetime()
+
+    # Read every monthly partition of a series in one multi-threaded scan
+    def read(self, symbol, interval, columns=None):
+        files = self._files(symbol, interval)
+        if not files:
+            return None
+        return self._scan(files, columns)
+
+    def _files(self, symbol, interval):
+        return sorted(glob.glob(os.path.join(self.series_dir(symbol, interval), "month=*", f"*{self.extension}")))
+
+    def _scan(self, files, columns=None):
+        file_format = "parquet" if self.file_format == "parquet" else "ipc"
+        return self.dataset.dataset(files, format=file_format).to_table(columns=columns).to_pandas()
+
+    def _read_file(self, file_path, columns=None):
+        if self.file_format == "parquet":
+            return self.parquet.read_table(file_path, columns=columns, memory_map=True)
+        return self.feather.read_table(file_path, columns=columns, memory_map=True)
+
+    # Time column as datetime64, every other column numeric
+    def _typed(self, df):
+        df = df.copy()
+        df[self.time_column] = pd.to_datetime(df[self.time_column])
+        for column in df.columns:
+            if column != self.time_column:
+                df[column] = pd.to_numeric(df[column])
+        return df
+
+    def _write_months(self, df, series_dir, merge):
+        months = df[self.time_column].dt.strftime('%Y-%m')
+        for month, month_df in df.groupby(months):
+            month_dir = os.path.join(series_dir, f"month={month}")
+            file_path = os.path.join(month_dir, f"part-0{self.extension}")
+            os.makedirs(month_dir, exist_ok=True)
+
+            if merge and os.path.exists(file_path):
+                stored = self._read_file(file_path).to_pandas()
+                month_df = pd.concat([stored, month_df])
+            month_df = (
+                month_df.drop_duplicates(subset=self.time_column, keep='last')
+                .sort_values(self.time_column)
+                .reset_index(drop=True)
+            )
+
+            table = self.pa.Table.from_pandas(month_df, preserve_index=False)
+            if self.file_format == "parquet":
+                self.parquet.write_table(table, file_path, compression=self.compression)
+            else:
+                self.feather.write_feather(table, file_path, compression=self.compression)
+
+
+# Build a storage backend by name: "csv", "parquet" or "feather"
+def get_storage(backend="csv", root=".", time_column="Open Time"):
+    if backend == "csv":
+        return CsvStorage(root, time_column)
+    if backend in ("parquet", "feather"):
+        return ColumnarStorage(root, time_column, file_format=backend)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+# Load a single stored file or columnar series directory into a DataFrame
+def load_table(path, time_column="Open Time"):
+    if os.path.isdir(path):
+        extension = ".feather" if glob.glob(os.path.join(path, "**", "*.feather"), recursive=True) else ".parquet"
+        files = sorted(glob.glob(os.path.join(path, "**", f"*{extension}"), recursive=True))
+        storage = ColumnarStorage(path, time_column, file_format=extension[1:])
+        return storage._scan(files)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, memory_map=True)
+    if path.endswith(".feather"):
+        return pd.read_feather(path, memory_map=True)
+    df = pd.read_csv(path)
+    if time_column in df.columns:
+        df[time_column] = pd.to_datetime(df[time_column], errors='coerce')
+    return df
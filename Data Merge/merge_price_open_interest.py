@@ -0,0 +1,107 @@
+import os
+import re
+import glob
+import argparse
+import pandas as pd
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PRICE_DIR = os.path.join(BASE_DIR, "Correct_Price_Data")
+OI_DIR = os.path.join(BASE_DIR, "Correct_Open_Interest-Data")
+OUTPUT_DIR = os.path.join(BASE_DIR, "Price_&_OpenInterest_Data")
+
+OI_COLUMNS = ['Open Interest (Contracts)', 'Open Interest (Crypto)', 'Open Interest (USD)']
+
+# Candle length per interval in nanoseconds
+INTERVAL_NS = {
+    "5m": 5 * 60 * 10**9,
+    "15m": 15 * 60 * 10**9,
+    "30m": 30 * 60 * 10**9,
+    "1h": 60 * 60 * 10**9,
+    "2h": 2 * 60 * 60 * 10**9,
+    "4h": 4 * 60 * 60 * 10**9,
+    "12h": 12 * 60 * 60 * 10**9,
+    "1d": 24 * 60 * 60 * 10**9,
+}
+
+# Price files are named BTC_4h_..., open interest files BTC-_4H_...; 1000PEPE prices pair with PEPE open interest
+def parse_file_name(file_path):
+    symbol, interval = os.path.basename(file_path).split("_")[:2]
+    symbol = re.sub(r"^1000", "", symbol.rstrip("-"))
+    return symbol, interval.lower()
+
+# Load every file of a directory into one frame tagged with Symbol/Interval
+def load_directory(directory, time_column):
+    frames = []
+    for file_path in sorted(glob.glob(os.path.join(directory, "*.csv"))):
+        symbol, interval = parse_file_name(file_path)
+        df = pd.read_csv(file_path)
+        # A few files name the time column 'timestamp'; it is always the first column
+        df = df.rename(columns={df.columns[0]: time_column})
+        df[time_column] = pd.to_datetime(df[time_column])
+        df['Symbol'] = symbol
+        df['Interval'] = interval
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+# Join every symbol/interval in one sorted pass, one row per candle
+def merge_price_open_interest(prices, open_interest):
+    # Candle length per row, as integer nanoseconds
+    interval_ns = open_interest['Interval'].map(INTERVAL_NS).to_numpy()
+    time_ns = open_interest['Time'].to_numpy().astype('datetime64[ns]').astype('int64')
+
+    # Align each snapshot to the candle it falls in and keep the latest one per candle
+    open_interest = open_interest.assign(Bucket=pd.to_datetime(time_ns - time_ns % interval_ns))
+    open_interest = (
+        open_interest.sort_values('Time')
+        .drop_duplicates(subset=['Symbol', 'Interval', 'Bucket'], keep='last')
+        .sort_values('Bucket')
+    )
+
+    # Candles can repeat in the source files too; keep the last copy
+    prices = (
+        prices.drop_duplicates(subset=['Symbol', 'Interval', 'Open Time'], keep='last')
+        .sort_values('Open Time')
+    )
+    prices['Open Time'] = prices['Open Time'].astype('datetime64[ns]')
+    open_interest['Bucket'] = open_interest['Bucket'].astype('datetime64[ns]')
+
+    merged = pd.merge_asof(
+        prices,
+        open_interest[['Symbol', 'Interval', 'Bucket'] + OI_COLUMNS],
+        left_on='Open Time',
+        right_on='Bucket',
+        by=['Symbol', 'Interval'],
+        direction='backward',
+    )
+
+    # Only keep candles whose own bucket had a snapshot, never a stale earlier one
+    merged = merged[merged['Bucket'] == merged['Open Time']]
+    merged = merged.drop(columns=['Bucket']).rename(columns={'Open Time': 'timestamp'})
+    return merged.sort_values(['Symbol', 'Interval', 'timestamp'])
+
+# Write one concatOutput_{symbol}_{interval}.csv per series
+def save_merged(merged, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for (symbol, interval), df in merged.groupby(['Symbol', 'Interval']):
+        file_name = os.path.join(output_dir, f"concatOutput_{symbol}_{interval}.csv")
+        df.drop(columns=['Symbol', 'Interval']).to_csv(file_name, index=False)
+        print(f"Wrote {len(df)} rows to {file_name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Join price candles with open interest, one row per candle.")
+    parser.add_argument("--price-dir", type=str, default=PRICE_DIR, help="Directory with price CSVs.")
+    parser.add_argument("--oi-dir", type=str, default=OI_DIR, help="Directory with open interest CSVs.")
+    parser.add_argument("--output-dir", type=str, default=OUTPUT_DIR, help="Directory for the concatOutput_* files.")
+    args = parser.parse_args()
+
+    prices = load_directory(args.price_dir, 'Open Time')
+    open_interest = load_directory(args.oi_dir, 'Time')
+    if prices.empty or open_interest.empty:
+        print("Nothing to merge.")
+        return
+
+    merged = merge_price_open_interest(prices, open_interest)
+    save_merged(merged, args.output_dir)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+import os
+import sys
 import tkinter as tk
-from tkinter import filedialog, messagebox, Scrollbar, Text
-import pandas as pd
+from tkinter import filedialog, messagebox, Scrollbar, Text, ttk
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from storage import load_table
+from background import run_in_background
+from downsample import lttb_indices, minmax_envelope, minmax_indices, scatter_indices
+from intervals import find_gaps, infer_interval_ns, interval_label, time_array
+
 
 
 # Initialize global variable to store the DataFrame
@@ -28,19 +35,35 @@ class CSVUploaderApp:
         self.status_label = tk.Label(self.master, text="", font=("Arial", 12), bg="#2E2E2E", fg="white")
         self.status_label.pack(pady=10)
 
+        # Shown while a file is loaded and analyzed in the background
+        self.progress = ttk.Progressbar(self.master, mode="indeterminate", length=300)
+
     def upload_csv(self):
-        file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("Parquet Files", "*.parquet"), ("Feather Files", "*.feather")])
         if file_path:
-            try:
-                # Read CSV file
-                self.df = pd.read_csv(file_path)
-                # Convert 'Open Time' to datetime for time-based analysis
-                self.df['Open Time'] = pd.to_datetime(self.df['Open Time'], errors='coerce')
-                self.status_label.config(text=f"CSV file uploaded successfully: {file_path}")
-                self.create_menu_frame()
-                self.analyze_data()  # Perform analysis after switching frames
-            except Exception as e:
-                self.status_label.config(text=f"Error uploading file: {str(e)}")
+            # Load and analyze on a worker thread so the window keeps responding on large files
+            self.upload_button.config(state=tk.DISABLED)
+            self.status_label.config(text=f"Loading and analyzing {file_path}...")
+            self.progress.pack(pady=10)
+            self.progress.start(10)
+            run_in_background(self.master, lambda: self.load_and_analyze(file_path), self.upload_finished, self.upload_failed)
+
+    # Runs on the worker thread: reads and analyzes the file but never touches a widget or self.df
+    def load_and_analyze(self, file_path):
+        # Read the file; CSV 'Open Time' is converted to datetime for time-based analysis
+        df = load_table(file_path)
+        return (df,) + self.analyze_data(df)
+
+    # Back on the Tk thread: only now does the loaded file replace the current one
+    def upload_finished(self, result):
+        self.df, self.stats_text, self.issues_text = result
+        self.create_menu_frame()
+
+    def upload_failed(self, error):
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.upload_button.config(state=tk.NORMAL)
+        self.status_label.config(text=f"Error uploading file: {str(error)}")
 
     def create_menu_frame(self):
         for widget in self.master.winfo_children():
@@ -79,56 +102,59 @@ class CSVUploaderApp:
         outlier_detection_button = tk.Button(menu_frame, text="Outlier Detection", command=self.outlier_detection_analysis, font=("Arial", 12), bg="#3498DB", fg="white", padx=10, pady=5)
         outlier_detection_button.pack(pady=10)
 
-    def analyze_data(self):
+    # Statistics and issue report of df, as text for the statistics frame
+    def analyze_data(self, df):
         # Basic Descriptive Statistics
-        num_rows = len(self.df)
-        missing_values = self.df.isnull().sum().sum()  # Total missing values in the dataset
-        unique_rows = len(self.df.drop_duplicates())
+        num_rows = len(df)
+        missing_values = df.isnull().sum().sum()  # Total missing values in the dataset
+        unique_rows = len(df.drop_duplicates())
         duplicate_rows = num_rows - unique_rows  # Number of duplicate rows
-        negative_values = (self.df.select_dtypes(include=['number']) < 0).sum().sum()  # Count of negative values in numeric columns
-
-        # Detect missing dates or time gaps in 'Open Time' for daily/interval-based data
-        data_sorted = self.df.sort_values(by='Open Time')  # Sort by 'Open Time'
-        
-        # Calculate the difference between consecutive dates
-        date_diff = data_sorted['Open Time'].diff().dt.days  # Assuming daily data here
-        missing_dates = (date_diff > 1).sum()  # Number of missing date gaps
+        negative_values = (df.select_dtypes(include=['number']) < 0).sum().sum()  # Count of negative values in numeric columns
+
+        # Detect time gaps in 'Open Time' at the series' own interval (its most common spacing),
+        # in integer nanoseconds so 1m/5m/15m data is checked as exactly as daily data
+        times = time_array(df['Open Time'])  # Sorted, de-duplicated int64 timestamps
+        interval_ns = infer_interval_ns(times)
+        gap_positions, missing_bars = find_gaps(times, interval_ns)
+        missing_dates = len(gap_positions)  # Number of missing date gaps
         
         # Check if 'Open Time' is in ascending order
-        is_ascending = self.df['Open Time'].is_monotonic_increasing
+        is_ascending = df['Open Time'].is_monotonic_increasing
 
         # Check for duplicate timestamps
-        duplicate_timestamps = self.df['Open Time'].duplicated().sum()  # Count of duplicate timestamps
-        unique_timestamps = len(self.df['Open Time']) - duplicate_timestamps  # Unique timestamps
+        duplicate_timestamps = df['Open Time'].duplicated().sum()  # Count of duplicate timestamps
+        unique_timestamps = len(df['Open Time']) - duplicate_timestamps  # Unique timestamps
 
         # Identify rows with issues
-        missing_rows = self.df[self.df.isnull().any(axis=1)].index.tolist()  # Row indices with missing values
-        duplicate_row_indices = self.df[self.df.duplicated(keep=False)].index.tolist()  # All duplicate row indices
-        negative_row_indices = self.df[(self.df.select_dtypes(include=['number']) < 0).any(axis=1)].index.tolist()  # Rows with negative values
+        missing_rows = df[df.isnull().any(axis=1)].index.tolist()  # Row indices with missing values
+        duplicate_row_indices = df[df.duplicated(keep=False)].index.tolist()  # All duplicate row indices
+        negative_row_indices = df[(df.select_dtypes(include=['number']) < 0).any(axis=1)].index.tolist()  # Rows with negative values
 
         # Adjust row indices for display (add 1)
         missing_rows_display = [i + 2 for i in missing_rows]
         duplicate_row_indices_display = [i + 2 for i in duplicate_row_indices]
         negative_row_indices_display = [i + 2 for i in negative_row_indices]
 
-        # Store results for display
-        self.stats_text = (
+        # Results for display
+        stats_text = (
             f"Total Rows: {num_rows}\n"
             f"Missing Values (total): {missing_values}\n"
             f"Unique Rows: {unique_rows}\n"
             f"Duplicate Rows: {duplicate_rows}\n"
             f"Negative Values (numeric columns): {negative_values}\n"
-            f"Missing Date Gaps: {missing_dates} (gaps in 'Open Time')\n"
+            f"Expected Interval: {interval_label(interval_ns)}\n"
+            f"Missing Date Gaps: {missing_dates} (gaps in 'Open Time', {missing_bars} bars missing)\n"
             f"Is 'Open Time' in Ascending Order: {'Yes' if is_ascending else 'No'}\n"
             f"Duplicate Timestamps: {duplicate_timestamps} (out of {num_rows})\n"
             f"Unique Timestamps: {unique_timestamps}\n"
         )
         # Row numbers causing issues
-        self.issues_text = (
+        issues_text = (
             f"Row Numbers with Missing Values: {missing_rows_display}\n"
             f"Row Numbers with Duplicate Entries: {duplicate_row_indices_display}\n"
             f"Row Numbers with Negative Values: {negative_row_indices_display}\n"
         )
+        return stats_text, issues_text
 
     def show_statistics(self):
         if self.df is not None:
@@ -187,21 +213,26 @@ class CSVUploaderApp:
                 # Create a figure with subplots
                 fig, axs = plt.subplots(3, 1, figsize=(10, 10), sharex=True)
 
-                # Plot Opening and Closing prices
-                axs[0].plot(self.df.index, self.df['Open'], label='Open', color='green', linewidth=1.5)
-                axs[0].plot(self.df.index, self.df['Close'], label='Close', color='red', linewidth=1.5)
+                # Plot Opening and Closing prices, each reduced to screen resolution
+                time_index = self.df.index.to_numpy()
+                for column, color in (('Open', 'green'), ('Close', 'red')):
+                    rows = lttb_indices(time_index, self.df[column].to_numpy())
+                    axs[0].plot(time_index[rows], self.df[column].to_numpy()[rows], label=column, color=color, linewidth=1.5)
                 axs[0].set_title('Opening and Closing Prices')
                 axs[0].set_ylabel('Price')
                 axs[0].legend()
 
-                # Plot Quote Asset Volume as a bar chart
-                axs[1].bar(self.df.index, self.df['Quote Asset Volume'], color='blue', alpha=0.6)
+                # Plot Quote Asset Volume as a bar chart: the min/max envelope of each screen-wide bucket of bars
+                edges, lows, highs = minmax_envelope(time_index, self.df['Quote Asset Volume'].to_numpy())
+                axs[1].fill_between(edges, 0, lows, step='post', color='blue', alpha=0.6, linewidth=0)
+                axs[1].fill_between(edges, lows, highs, step='post', color='blue', alpha=0.3, linewidth=0)
                 axs[1].set_title('Quote Asset Volume Histogram')
                 axs[1].set_ylabel('Quote Asset Volume')
 
                 # Optional: You could add a third plot for Open Interest if needed
                 if 'Open Interest (USD)' in self.df.columns:
-                    axs[2].plot(self.df.index, self.df['Open Interest (USD)'], label='Open Interest', color='purple', linewidth=1.5)
+                    rows = lttb_indices(time_index, self.df['Open Interest (USD)'].to_numpy())
+                    axs[2].plot(time_index[rows], self.df['Open Interest (USD)'].to_numpy()[rows], label='Open Interest', color='purple', linewidth=1.5)
                     axs[2].set_title('Open Interest Over Time')
                     axs[2].set_ylabel('Open Interest')
                     axs[2].legend()
@@ -289,15 +320,17 @@ class CSVUploaderApp:
                 # Create figure for scatter plots: Trading Volume vs Close Price and Quote Asset Volume vs Close Price
                 fig, axs = plt.subplots(1, 2, figsize=(14, 6))
                 
-                # Scatter plot: Volume vs Close Price
-                axs[0].scatter(self.df['Volume'], self.df['Close'], color='blue', alpha=0.5)
+                # Scatter plot: Volume vs Close Price, one point per screen cell
+                rows = scatter_indices(self.df['Volume'], self.df['Close'])
+                axs[0].scatter(self.df['Volume'].iloc[rows], self.df['Close'].iloc[rows], color='blue', alpha=0.5)
                 axs[0].set_title('Trading Volume vs Close Price')
                 axs[0].set_xlabel('Volume')
                 axs[0].set_ylabel('Close Price')
 
                 # Scatter plot: Quote Asset Volume vs Close Price
                 if 'Quote Asset Volume' in self.df.columns:
-                    axs[1].scatter(self.df['Quote Asset Volume'], self.df['Close'], color='green', alpha=0.5)
+                    rows = scatter_indices(self.df['Quote Asset Volume'], self.df['Close'])
+                    axs[1].scatter(self.df['Quote Asset Volume'].iloc[rows], self.df['Close'].iloc[rows], color='green', alpha=0.5)
                     axs[1].set_title('Quote Asset Volume vs Close Price')
                     axs[1].set_xlabel('Quote Asset Volume')
                     axs[1].set_ylabel('Close Price')
@@ -308,15 +341,17 @@ class CSVUploaderApp:
                 # Create figure for time series plots: Volume over time and Quote Asset Volume over time
                 fig, axs = plt.subplots(2, 1, figsize=(12, 10))
 
-                # Plot Volume over time
-                axs[0].plot(self.df.index, self.df['Volume'], label='Volume', color='blue')
+                # Plot Volume over time, reduced to screen resolution
+                rows = lttb_indices(self.df.index.to_numpy(), self.df['Volume'].to_numpy())
+                axs[0].plot(self.df.index[rows], self.df['Volume'].iloc[rows], label='Volume', color='blue')
                 axs[0].set_title('Volume Over Time')
                 axs[0].set_xlabel('Time')
                 axs[0].set_ylabel('Volume')
 
                 # Plot Quote Asset Volume over time
                 if 'Quote Asset Volume' in self.df.columns:
-                    axs[1].plot(self.df.index, self.df['Quote Asset Volume'], label='Quote Asset Volume', color='orange')
+                    rows = lttb_indices(self.df.index.to_numpy(), self.df['Quote Asset Volume'].to_numpy())
+                    axs[1].plot(self.df.index[rows], self.df['Quote Asset Volume'].iloc[rows], label='Quote Asset Volume', color='orange')
                     axs[1].set_title('Quote Asset Volume Over Time')
                     axs[1].set_xlabel('Time')
                     axs[1].set_ylabel('Quote Asset Volume')
@@ -436,7 +471,9 @@ class CSVUploaderApp:
                 for i, col in enumerate(columns_to_analyze):
                     if col in self.df.columns:
                         plt.subplot(2, 2, i + 1)
-                        plt.scatter(self.df.index, self.df[col], color='blue', alpha=0.5)
+                        # Only each bucket's lowest and highest point is drawn; the outliers are among them
+                        rows = minmax_indices(self.df[col].to_numpy())
+                        plt.scatter(self.df.index[rows], self.df[col].iloc[rows], color='blue', alpha=0.5)
                         plt.axhline(y=self.df[col].mean() + 3 * self.df[col].std(), color='red', linestyle='--', label='Upper Outlier Threshold')
                         plt.axhline(y=self.df[col].mean() - 3 * self.df[col].std(), color='red', linestyle='--', label='Lower Outlier Threshold')
                         plt.title(f'Outlier Detection for {col}')
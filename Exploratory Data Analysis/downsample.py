@@ -0,0 +1,98 @@
+import numpy as np
+
+# Screen-resolution budgets: a 10-12 inch figure is about 1000-1200 pixels wide
+LINE_POINTS = 2000  # Points kept per line by largest-triangle-three-buckets
+ENVELOPE_BUCKETS = 1000  # Buckets per min/max envelope
+SCATTER_GRID = (400, 300)  # Marker-sized cells a scatter plot is reduced to, one point per occupied cell
+
+
+# Numbers the triangle areas can be computed on; dates become nanoseconds since the first one
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype(np.int64)
+        return (values - values[0]).astype(np.float64) if values.size else values.astype(np.float64)
+    return values.astype(np.float64)
+
+# Positions of the rows where both x and y can be drawn
+def _finite_rows(x, y):
+    return np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+
+# Row positions to draw for a line: largest-triangle-three-buckets keeps the first and last
+# point and, from each bucket in between, the point spanning the largest triangle with the
+# point kept before it and the average of the next bucket. Peaks and troughs survive.
+def lttb_indices(x, y, threshold=LINE_POINTS):
+    x, y = _as_float(x), _as_float(y)
+    rows = _finite_rows(x, y)
+    n = rows.size
+    if threshold < 3 or n <= threshold:
+        return rows
+    x, y = x[rows], y[rows]
+
+    # threshold - 2 buckets over the interior points, averaged with cumulative sums
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = edges[1:] - edges[:-1]
+    x_means = (x_sums[edges[1:]] - x_sums[edges[:-1]]) / sizes
+    y_means = (y_sums[edges[1:]] - y_sums[edges[:-1]]) / sizes
+    x_means = np.append(x_means[1:], x[-1])  # The "next bucket" of the last bucket is the last point
+    y_means = np.append(y_means[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        area = np.abs(
+            (x[previous] - x_means[bucket]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (y_means[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return rows[selected]
+
+# Row positions of the lowest and highest point in each of `buckets` equal runs of rows, in
+# order; for scatter plots over time, where the extremes are the points that matter
+def minmax_indices(y, buckets=ENVELOPE_BUCKETS):
+    y = _as_float(y)
+    rows = np.flatnonzero(np.isfinite(y))
+    if rows.size <= 2 * buckets:
+        return rows
+    starts = np.linspace(0, rows.size, buckets + 1).astype(np.int64)[:-1]
+    sizes = np.diff(np.append(starts, rows.size))
+    values = y[rows]
+    bucket_of_row = np.repeat(np.arange(buckets), sizes)
+
+    # First row in each bucket equal to the bucket's min (or max); linear, no sorting
+    kept = []
+    for extreme in (np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)):
+        hits = np.flatnonzero(values == np.repeat(extreme, sizes))
+        kept.append(hits[np.flatnonzero(np.diff(bucket_of_row[hits], prepend=-1))])
+    return rows[np.union1d(*kept)]
+
+# Per-bucket (x, min, max) for bar-like series such as volume; x has one extra closing edge so
+# the envelope can be filled with step='post'
+def minmax_envelope(x, y, buckets=ENVELOPE_BUCKETS):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max(1, min(buckets, y.size))
+    starts = np.linspace(0, y.size, buckets + 1).astype(np.int64)[:-1]
+    lows = np.fmin.reduceat(y, starts)
+    highs = np.fmax.reduceat(y, starts)
+    return np.append(x[starts], x[-1:]), np.append(lows, lows[-1]), np.append(highs, highs[-1])
+
+# Row positions for an x/y scatter plot: one point per occupied cell of a grid about one marker
+# wide. Every region the full plot would mark, outliers included, is still marked.
+def scatter_indices(x, y, grid=SCATTER_GRID):
+    x, y = _as_float(x), _as_float(y)
+    rows = _finite_rows(x, y)
+    if rows.size <= grid[0] * grid[1] // 100:
+        return rows
+    cells = []
+    for values, size in ((x[rows], grid[0]), (y[rows], grid[1])):
+        low, high = values.min(), values.max()
+        scale = (size - 1) / (high - low) if high > low else 0
+        cells.append(((values - low) * scale).astype(np.int64))
+    _, first = np.unique(cells[0] * grid[1] + cells[1], return_index=True)
+    return rows[np.sort(first)]
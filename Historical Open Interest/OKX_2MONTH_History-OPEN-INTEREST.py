@@ -1,83 +1,175 @@
+import os
+import sys
+import argparse
+import threading
 import requests
-import csv
+import pandas as pd
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def unix_to_human(timestamp):
-    """Convert Unix timestamp to human-readable format with timezone-aware UTC."""
-    return datetime.fromtimestamp(int(timestamp) / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import OKX_RETRIES, okx_get
+from storage import get_storage
 
 # Define the API endpoint
-url = "https://www.okx.com/api/v5/rubik/stat/contracts/open-interest-history"
+endpoint = "/api/v5/rubik/stat/contracts/open-interest-history"
+url = "https://www.okx.com" + endpoint
+
+# Maximum number of records OKX returns per request
+OI_PAGE_LIMIT = 100
+
+# Length of one period per OKX interval, in milliseconds
+PERIOD_MS = {
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1H": 60 * 60_000,
+    "2H": 2 * 60 * 60_000,
+    "4H": 4 * 60 * 60_000,
+    "6H": 6 * 60 * 60_000,
+    "12H": 12 * 60 * 60_000,
+    "1D": 24 * 60 * 60_000,
+}
 
 # Initialize request counter
 request_counter = 0
+request_counter_lock = threading.Lock()
+
+def unix_to_human(timestamp):
+    """Convert Unix timestamp to human-readable format with timezone-aware UTC."""
+    return datetime.fromtimestamp(int(timestamp) / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
 
-# Calculate the current UTC time and 1440 hours ago (60 days)
-end_date = datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
-start_date = end_date - timedelta(hours=1440)
-
-# Symbols and intervals to loop through
-#symbols = ["BTC-USDT-SWAP", "ETH-USDT-SWAP", "BNB-USDT-SWAP", "SOL-USDT-SWAP", "1000PEPE-USDT-SWAP"]
-#intervals = ["1H", "4H", "1D"]  # Adjusted intervals according to the valid periods
-symbols = ["BTC-USDT-SWAP"]
-intervals = ["1H"]  # Adjusted intervals according to the valid periods
-
-print(f"Fetching data for {symbols} from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}...")
-
-for symbol in symbols:
-    for interval in intervals:
-        all_data = []
-        symbol_name = symbol.replace('USDT-SWAP', '')
-        current_date = start_date
-
-        while current_date <= end_date:
-            start_ts = int(current_date.timestamp() * 1000)
-            end_ts = int((current_date + timedelta(hours=24)).timestamp() * 1000)
-
-            print(f"Fetching {interval} data for {symbol} on {current_date.strftime('%Y-%m-%d')}...")
-
-            params = {
-                "instId": symbol,
-                "period": interval,
-                "begin": str(start_ts),
-                "end": str(end_ts),
-                "limit": "24"
-            }
-
-            response = requests.get(url, params=params)
-            request_counter += 1
-
-            data = response.json()
-           # print(f"Response Data for {symbol} on {current_date.strftime('%Y-%m-%d')}: {data}")
-
-            if response.status_code == 200:
-                if 'data' in data:
-                    if data['data']:
-                        all_data.extend(data['data'])
-                    else:
-                        print(f"No data found for {current_date.strftime('%Y-%m-%d')} for {symbol}")
-                else:
-                    print(f"Unexpected response structure for {symbol}")
-            else:
-                print(f"Error: {response.status_code} - {response.text} for {symbol}")
-
-            current_date += timedelta(hours=24)
-
-        if all_data:
-            all_data.sort(key=lambda x: x[0])
-            file_name = f"{symbol_name}_{interval}_{start_date.strftime('%Y%m%d')}_to_{end_date.strftime('%Y%m%d')}.csv"
-            
-            with open(file_name, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(['Time', 'Open Interest (Contracts)', 'Open Interest (Crypto)', 'Open Interest (USD)'])
-                
-                for record in all_data:
-                    timestamp, oi, oiCcy, oiUsd = record
-                    human_time = unix_to_human(timestamp)
-                    writer.writerow([human_time, oi, oiCcy, oiUsd])
-
-            print(f"Data for {symbol} ({interval}) has been written to {file_name}")
-        else:
-            print(f"No data to write for {symbol} ({interval})")
-
-print(f"Number of requests sent: {request_counter}")
+# Split [start_ms, end_ms] into windows of exactly OI_PAGE_LIMIT periods
+def page_windows(interval, start_ms, end_ms):
+    page_ms = OI_PAGE_LIMIT * PERIOD_MS[interval]
+    return [(begin, min(begin + page_ms - 1, end_ms)) for begin in range(start_ms, end_ms + 1, page_ms)]
+
+# Fetch one window of open interest records over the shared session. okx_get retries throttled,
+# failed and server-error responses; a window that still fails raises instead of coming back
+# empty, so the history never has a silent hole.
+def fetch_open_interest_page(session, symbol, interval, begin_ms, end_ms):
+    global request_counter
+
+    params = {
+        "instId": symbol,
+        "period": interval,
+        "begin": str(begin_ms),
+        "end": str(end_ms),
+        "limit": str(OI_PAGE_LIMIT)
+    }
+    window = f"{interval} {symbol} {unix_to_human(begin_ms)} to {unix_to_human(end_ms)}"
+
+    response = okx_get(url, endpoint, params, session=session)
+    with request_counter_lock:
+        request_counter += 1
+
+    if response is None:
+        raise RuntimeError(f"Open interest request for {window} got no response after {OKX_RETRIES} attempts")
+    if response.status_code != 200:
+        raise RuntimeError(f"Open interest request for {window} failed: {response.status_code} - {response.text}")
+
+    data = response.json()
+    if 'data' not in data:
+        raise RuntimeError(f"Unexpected response structure for {window}: {data}")
+    if not data['data']:
+        print(f"No data found for {window}")
+    return data['data']
+
+# Fetch the full open interest history of one series, one request per OI_PAGE_LIMIT periods
+def fetch_open_interest_history(session, symbol, interval, start_date, end_date):
+    start_ms = int(start_date.timestamp() * 1000)
+    end_ms = int(end_date.timestamp() * 1000)
+    windows = page_windows(interval, start_ms, end_ms)
+
+    print(f"Fetching {interval} data for {symbol} in {len(windows)} requests...")
+
+    records = {}
+    for begin_ms, window_end_ms in windows:
+        for record in fetch_open_interest_page(session, symbol, interval, begin_ms, window_end_ms):
+            records[record[0]] = record  # Keyed by timestamp, so overlapping pages cannot duplicate rows
+    return sorted(records.values(), key=lambda x: int(x[0]))
+
+# Store one series through the configured backend
+def save_open_interest(all_data, symbol, interval, start_date, end_date, storage):
+    symbol_name = symbol.replace('USDT-SWAP', '')
+    df = pd.DataFrame(all_data, columns=['Time', 'Open Interest (Contracts)', 'Open Interest (Crypto)', 'Open Interest (USD)'])
+    df['Time'] = df['Time'].map(unix_to_human)
+
+    file_name = storage.write(df, symbol_name, interval, start_date, end_date)
+    print(f"Data for {symbol} ({interval}) has been written to {file_name}")
+
+def collect_series(session, symbol, interval, start_date, end_date, storage):
+    all_data = fetch_open_interest_history(session, symbol, interval, start_date, end_date)
+    if all_data:
+        save_open_interest(all_data, symbol, interval, start_date, end_date, storage)
+    else:
+        print(f"No data to write for {symbol} ({interval})")
+
+# Collect every symbol/interval concurrently; the shared endpoint limiter sets the pace.
+# Returns the errors of the series that could not be fetched completely (and were not written).
+def collect(symbols, intervals, start_date, end_date, storage, max_workers=8):
+    errors = []
+    with requests.Session() as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(collect_series, session, symbol, interval, start_date, end_date, storage)
+                for symbol in symbols
+                for interval in intervals
+            ]
+
+            # Wait for all tasks to complete; one failed series does not stop the others
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except RuntimeError as e:
+                    print(f"ERROR: {e}. The series was not written.")
+                    errors.append(e)
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Download OKX open interest history.")
+    parser.add_argument(
+        "--symbols",
+        type=str,
+        default="BTC-USDT-SWAP,ETH-USDT-SWAP,BNB-USDT-SWAP,SOL-USDT-SWAP,PEPE-USDT-SWAP",
+        help="Comma-separated OKX instrument IDs.",
+    )
+    parser.add_argument(
+        "--intervals",
+        type=str,
+        default="1H,4H,1D",
+        help="Comma-separated OKX periods (default: 1H,4H,1D).",
+    )
+    parser.add_argument(
+        "--hours",
+        type=int,
+        default=1440,
+        help="How many hours of history to fetch (default: 1440, i.e. 60 days).",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["csv", "parquet", "feather"],
+        default="csv",
+        help="Storage backend for the output.",
+    )
+    args = parser.parse_args()
+
+    symbols = args.symbols.split(",")
+    intervals = args.intervals.split(",")  # Adjusted intervals according to the valid periods
+    storage = get_storage(args.storage, ".", time_column="Time")
+
+    # Calculate the current UTC time and the requested number of hours ago (60 days by default)
+    end_date = datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+    start_date = end_date - timedelta(hours=args.hours)
+
+    print(f"Fetching data for {symbols} from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}...")
+
+    errors = collect(symbols, intervals, start_date, end_date, storage)
+
+    print(f"Number of requests sent: {request_counter}")
+    if errors:
+        print(f"{len(errors)} series failed and were not written; run again to fetch them.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
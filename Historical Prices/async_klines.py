@@ -0,0 +1,125 @@
+import os
+import sys
+import asyncio
+import aiohttp
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import binance_limiter, binance_kline_weight
+
+from binance_historical_prices_backup import (
+    INTERVAL_MS,
+    KLINE_LIMIT,
+    incremental_start,
+    append_new_klines,
+    save_data_to_csv,
+)
+
+BASE_URL = "https://fapi.binance.com"
+ENDPOINT = "/fapi/v1/klines"
+
+
+# Fetch one page of klines over the shared keep-alive session
+async def fetch_page(session, symbol, interval, start_ms, end_ms, retries=3):
+    params = {
+        "symbol": symbol,
+        "interval": interval,
+        "startTime": start_ms,
+        "endTime": end_ms,
+        "limit": KLINE_LIMIT,
+    }
+
+    for attempt in range(retries):
+        try:
+            await binance_limiter.acquire_async(binance_kline_weight(KLINE_LIMIT))
+            async with session.get(BASE_URL + ENDPOINT, params=params) as response:
+                binance_limiter.update(response.status, response.headers)
+                if response.status in (429, 418):
+                    print(f"Rate limited ({response.status}) fetching {symbol} at {interval}, backing off...")
+                    continue
+                response.raise_for_status()
+                return await response.json()
+        except aiohttp.ClientResponseError as e:
+            print(f"Error fetching data for {symbol} at {interval}: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Connection error: {e}. Retrying in {2 ** attempt} seconds...")
+            await asyncio.sleep(2 ** attempt)
+    print(f"Failed to fetch data for {symbol} after {retries} attempts.")
+    return None
+
+
+# Split [start_ms, end_ms) into windows of exactly KLINE_LIMIT bars
+def page_windows(interval, start_ms, end_ms):
+    page_ms = KLINE_LIMIT * INTERVAL_MS[interval]
+    return [(page_start, min(page_start + page_ms, end_ms) - 1) for page_start in range(start_ms, end_ms, page_ms)]
+
+
+# Fetch every page of a range concurrently; bar boundaries are fixed so pages never overlap.
+# Raises if any page could not be fetched, like the threaded fetch_klines_range.
+async def fetch_klines_range_async(session, symbol, interval, start_time, end_time):
+    start_ms = int(start_time.timestamp() * 1000)
+    end_ms = int(end_time.timestamp() * 1000)
+    windows = page_windows(interval, start_ms, end_ms)
+
+    print(f"Fetching {interval} data for {symbol}: {len(windows)} pages")
+    pages = await asyncio.gather(*(fetch_page(session, symbol, interval, page_start, page_end) for page_start, page_end in windows))
+    for (page_start, _), page in zip(windows, pages):
+        if page is None:
+            start = datetime.fromtimestamp(page_start / 1000, tz=timezone.utc)
+            raise RuntimeError(f"Could not fetch {symbol} {interval} from {start.strftime('%Y-%m-%d %H:%M')}")
+    return [row for page in pages for row in page]
+
+
+# Full download of one series into storage
+async def download_series(session, symbol, interval, start_date, end_date, storage):
+    all_data = await fetch_klines_range_async(session, symbol, interval, start_date, end_date)
+    if all_data:
+        # File writing is blocking, keep it off the event loop
+        await asyncio.to_thread(save_data_to_csv, all_data, symbol, interval, start_date, end_date, storage)
+
+
+# Incremental update of one stored series
+async def update_series(session, symbol, interval, storage):
+    last_open_time = await asyncio.to_thread(incremental_start, symbol, interval, storage)
+    if last_open_time is None:
+        return
+
+    now = datetime.now(timezone.utc)
+    start_time = last_open_time + timedelta(milliseconds=INTERVAL_MS[interval])
+    if start_time >= now:
+        print(f"{symbol} {interval} is already up to date ({last_open_time.strftime('%Y-%m-%d %H:%M:%S')})")
+        return
+
+    all_data = await fetch_klines_range_async(session, symbol, interval, start_time, now)
+    await asyncio.to_thread(append_new_klines, all_data, symbol, interval, storage, last_open_time, now)
+
+
+# Download or update all series over one pooled session; concurrency is bounded by the rate limiter.
+# Returns the errors of the series that failed and were not written.
+async def download_all(symbols, intervals, start_date, end_date, storage, incremental=False, max_connections=100):
+    connector = aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = []
+        for symbol in symbols:
+            for interval in intervals:
+                if incremental:
+                    tasks.append(update_series(session, symbol, interval, storage))
+                else:
+                    tasks.append(download_series(session, symbol, interval, start_date, end_date, storage))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    errors = []
+    for result in results:
+        if isinstance(result, RuntimeError):
+            print(f"ERROR: {result}. The series was not written.")
+            errors.append(result)
+        elif isinstance(result, BaseException):
+            raise result
+    return errors
+
+
+def run(symbols, intervals, start_date, end_date, storage, incremental=False):
+    return asyncio.run(download_all(symbols, intervals, start_date, end_date, storage, incremental))
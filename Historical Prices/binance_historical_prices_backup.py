@@ -1,11 +1,40 @@
+import os
+import sys
+import argparse
 import requests
 from requests.exceptions import ConnectionError
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def fetch_binance_futures_data(symbol, interval, start_time, end_time):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import binance_limiter, binance_kline_weight
+from storage import CsvStorage, get_storage
+
+# Directory every engine stores kline data in, and incremental updates read the high-water mark from
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Correct_Price_Data")
+
+# Length of one candle per Binance interval, in milliseconds
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+# Maximum number of klines Binance returns per request
+KLINE_LIMIT = 1000
+
+def fetch_binance_futures_data(symbol, interval, start_time, end_time, limit=KLINE_LIMIT):
     base_url = "https://fapi.binance.com"
     endpoint = "/fapi/v1/klines"
     
@@ -14,13 +43,18 @@ def fetch_binance_futures_data(symbol, interval, start_time, end_time):
         "interval": interval,
         "startTime": int(start_time.timestamp() * 1000),
         "endTime": int(end_time.timestamp() * 1000),
-        "limit": 1000
+        "limit": limit
     }
     
     retries = 3  # Reduced retries to 3
     for attempt in range(retries):
         try:
+            binance_limiter.acquire(binance_kline_weight(limit))  # Shared by all worker threads
             response = requests.get(base_url + endpoint, params=params)
+            binance_limiter.update(response.status_code, response.headers)
+            if response.status_code in (429, 418):
+                print(f"Rate limited ({response.status_code}) fetching {symbol} at {interval}, backing off...")
+                continue
             response.raise_for_status()  # Raise an error for bad responses
             return response.json()
         except ConnectionError as e:
@@ -32,7 +66,35 @@ def fetch_binance_futures_data(symbol, interval, start_time, end_time):
     print(f"Failed to fetch data for {symbol} after {retries} attempts.")
     return None
 
-def save_data_to_csv(data, symbol, interval, start_date, end_date):
+# Page through [start_time, end_time) with a cursor on the last returned 'Close Time'.
+# An empty page (before listing) is skipped; a page that could not be fetched raises, so a
+# series with a hole is never written and an incremental high-water mark never skips it.
+def fetch_klines_range(symbol, interval, start_time, end_time):
+    start_ms = int(start_time.timestamp() * 1000)
+    end_ms = int(end_time.timestamp() * 1000)
+    page_ms = KLINE_LIMIT * INTERVAL_MS[interval]  # One request covers exactly KLINE_LIMIT bars
+    all_data = []
+
+    while start_ms < end_ms:
+        page_end_ms = min(start_ms + page_ms, end_ms) - 1
+        page_start = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
+        page_end = datetime.fromtimestamp(page_end_ms / 1000, tz=timezone.utc)
+
+        print(f"Fetching {interval} data for {symbol} from {page_start.strftime('%Y-%m-%d %H:%M')} to {page_end.strftime('%Y-%m-%d %H:%M')}")
+
+        data = fetch_binance_futures_data(symbol, interval, page_start, page_end)
+        if data is None:
+            raise RuntimeError(f"Could not fetch {symbol} {interval} from {page_start.strftime('%Y-%m-%d %H:%M')}")
+        if data:
+            all_data.extend(data)
+            start_ms = data[-1][6] + 1  # Next page starts right after the last 'Close Time'
+        else:
+            start_ms = page_end_ms + 1  # Empty page (e.g. before listing), skip the whole window
+
+    return all_data
+
+# Convert raw kline rows into the stored column layout
+def klines_to_dataframe(data):
     df = pd.DataFrame(data, columns=[
         "Open Time", "Open", "High", "Low", "Close", "Volume",
         "Close Time", "Quote Asset Volume", "Number of Trades",
@@ -43,53 +105,133 @@ def save_data_to_csv(data, symbol, interval, start_date, end_date):
     df = df[["Open Time", "Open", "High", "Low", "Close", "Volume", "Quote Asset Volume"]]
     df["Open Time"] = pd.to_datetime(df["Open Time"], unit='ms')
     df.sort_values(by="Open Time", inplace=True)
+    return df
+
+# Store a full download through the configured backend (CSV in DATA_DIR by default)
+def save_data_to_csv(data, symbol, interval, start_date, end_date, storage=None):
+    df = klines_to_dataframe(data)
     
-    # Generate CSV file name
-    symbol_name = symbol.replace('USDT', '')  # Clean the symbol name
-    file_name = f"{symbol_name}_{interval}_{start_date.strftime('%Y%m%d')}_to_{end_date.strftime('%Y%m%d')}.csv"
+    # Clean the symbol name used for file and partition names
+    symbol_name = symbol.replace('USDT', '')
+    storage = storage or CsvStorage(DATA_DIR)
     
-    # Save to CSV
-    df.to_csv(file_name, index=False)
+    # Save to storage
+    file_name = storage.write(df, symbol_name, interval, start_date, end_date)
     print(f"Data saved to {file_name}")
 
-def fetch_and_save(symbol, interval, start_date, end_date):
-    current_date = start_date
-    all_data = []
+# Read the stored high-water mark for an incremental update
+def incremental_start(symbol, interval, storage):
+    symbol_name = symbol.replace('USDT', '')
+    last_open_time = storage.last_timestamp(symbol_name, interval)
+    if last_open_time is None:
+        print(f"No stored data for {symbol} {interval} in {storage.root}, run a full download first.")
+        return None
 
-    # Fetch data 15 days at a time
-    while current_date < end_date:
-        next_date = min(current_date + timedelta(days=15), end_date)
-        
-        print(f"Fetching {interval} data for {symbol} from {current_date.strftime('%Y-%m-%d')} to {next_date.strftime('%Y-%m-%d')}")
-        
-        data = fetch_binance_futures_data(symbol, interval, current_date, next_date)
-        if data:
-            all_data.extend(data)
-        
-        current_date = next_date
-        time.sleep(0.25)  # Small delay after each request to avoid API rate limits
+    return last_open_time.replace(tzinfo=timezone.utc)
+
+# Append the closed candles newer than the high-water mark
+def append_new_klines(all_data, symbol, interval, storage, last_open_time, now):
+    # Keep only closed candles that are newer than the high-water mark
+    now_ms = int(now.timestamp() * 1000)
+    last_ms = int(last_open_time.timestamp() * 1000)
+    closed = {row[0]: row for row in all_data if row[6] < now_ms and row[0] > last_ms}
+    if not closed:
+        print(f"No new closed candles for {symbol} {interval}")
+        return
+
+    df = klines_to_dataframe(list(closed.values()))
+    location = storage.append(df, symbol.replace('USDT', ''), interval, now)
+    print(f"Appended {len(df)} rows to {location}")
+
+# Append only the candles missing since the high-water mark of the stored series
+def update_csv(symbol, interval, storage):
+    last_open_time = incremental_start(symbol, interval, storage)
+    if last_open_time is None:
+        return
+
+    now = datetime.now(timezone.utc)
+    start_time = last_open_time + timedelta(milliseconds=INTERVAL_MS[interval])
+    if start_time >= now:
+        print(f"{symbol} {interval} is already up to date ({last_open_time.strftime('%Y-%m-%d %H:%M:%S')})")
+        return
+
+    all_data = fetch_klines_range(symbol, interval, start_time, now)
+    append_new_klines(all_data, symbol, interval, storage, last_open_time, now)
+
+def fetch_and_save(symbol, interval, start_date, end_date, storage=None):
+    # Fetch data in full KLINE_LIMIT-bar pages
+    all_data = fetch_klines_range(symbol, interval, start_date, end_date)
     
     # Save the data if fetched
     if all_data:
-        save_data_to_csv(all_data, symbol, interval, start_date, end_date)
+        save_data_to_csv(all_data, symbol, interval, start_date, end_date, storage)
+
+# Exit non-zero after every series has run if any of them failed
+def report_failures(errors):
+    if errors:
+        print(f"{len(errors)} series failed and were not written; run again to fetch them.")
+        sys.exit(1)
 
 def main():
+    parser = argparse.ArgumentParser(description="Download Binance USDT-M futures klines to CSV.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch candles newer than the last 'Open Time' stored in --data-dir and append them.",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Use the asyncio/aiohttp engine: all pages of all series concurrently over one pooled session.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=None,
+        help="Directory to store into, for every engine and mode (default: Correct_Price_Data).",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["csv", "parquet", "feather"],
+        default="csv",
+        help="Storage backend: CSV files, or typed columnar files partitioned by symbol/interval/month.",
+    )
+    args = parser.parse_args()
+
+    storage = get_storage(args.storage, args.data_dir or DATA_DIR)
+
     symbols = ["BTCUSDT", "ETHUSDT","BNBUSDT", "SOLUSDT", "1000PEPEUSDT"]
     intervals = ["1h", "4h", "1d"]  # Intervals: 1-hour, 4-hour, 1-day
     start_date = datetime.strptime("2019-08-30", "%Y-%m-%d")  # Start date
     end_date = datetime.strptime("2024-10-09", "%Y-%m-%d")    # End date (exclusive)
+
+    if args.use_async:
+        # Imported here so the threaded mode does not require aiohttp
+        from async_klines import run
+        report_failures(run(symbols, intervals, start_date, end_date, storage, args.incremental))
+        return
     
-    # Use ThreadPoolExecutor for parallel data fetching
-    with ThreadPoolExecutor(max_workers=3) as executor:
+    # One worker per series; the shared rate limiter decides how fast they go
+    errors = []
+    with ThreadPoolExecutor(max_workers=len(symbols) * len(intervals)) as executor:
         futures = []
         
         for symbol in symbols:
             for interval in intervals:
-                futures.append(executor.submit(fetch_and_save, symbol, interval, start_date, end_date))
+                if args.incremental:
+                    futures.append(executor.submit(update_csv, symbol, interval, storage))
+                else:
+                    futures.append(executor.submit(fetch_and_save, symbol, interval, start_date, end_date, storage))
         
-        # Wait for all tasks to complete
+        # Wait for all tasks to complete; one failed series does not stop the others
         for future in as_completed(futures):
-            future.result()  # This will raise exceptions if any occurred
+            try:
+                future.result()
+            except RuntimeError as e:
+                print(f"ERROR: {e}. The series was not written.")
+                errors.append(e)
+    report_failures(errors)
 
 if __name__ == "__main__":
     main()
@@ -1,72 +1,270 @@
-import pandas as pd
+import os
+import csv
+import glob
+import math
+import time
+import queue
+import threading
+import argparse
+from collections import deque
+from datetime import datetime, timezone
 import matplotlib.pyplot as plt
-import mplfinance as mpf
+import matplotlib.dates as mdates
 from matplotlib.animation import FuncAnimation
-import time
+from matplotlib.collections import LineCollection, PolyCollection
+from bar_bus import BUS_PORT, BarSubscriber, bar_topic
 
-# Function to read data from the CSV file
-def read_data():
-    df = pd.read_csv('Live_Candlestick_Data.csv', parse_dates=['Open Time'])
-    df.rename(columns={'Open Time': 'timestamp', 'Quote Asset Volume': 'volume_usd', 'Open Interest (USD)': 'open_interest_usd'}, inplace=True)
-    return df
+CSV_FILE = 'Live_Candlestick_Data.csv'
+MAX_BARS = 500  # Bars kept on screen; older bars drop out of the rolling buffer
+HEADROOM_BARS = 20  # Empty slots kept on the right so the axes only rescale every few bars
 
-# Initialize variables for row counting and plotting
-last_row_count = 0
-df = pd.DataFrame()
+# Reads only the rows appended to the CSV since the previous call, from the last byte offset.
+# With rotate_daily it follows the recorder's per-day {name}_YYYY-MM-DD.csv files instead,
+# moving on to each new day's file once the previous one has been read to the end.
+class CsvTail:
+    def __init__(self, file_path, rotate_daily=False):
+        self.base_path = file_path
+        self.rotate_daily = rotate_daily
+        self.file_path = self.newest_path()
+        self.offset = 0
+        self.pending = b""  # A partially written last line, completed by the next read
 
-# Create a figure and axes for the plot
-fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
-plt.ion()  # Turn on interactive mode
+    def newest_path(self):
+        if not self.rotate_daily:
+            return self.base_path
+        root, ext = os.path.splitext(self.base_path)
+        paths = sorted(glob.glob(f"{root}_????-??-??{ext}"))
+        return paths[-1] if paths else self.base_path
 
-# Animation function
-def update_plot(_):
-    global last_row_count, df
-    try:
-        new_df = read_data()
-        current_row_count = new_df.shape[0]  # Get the current number of rows
+    # Start near the end of a large file: only the last max_rows lines are ever shown
+    def skip_to_last(self, max_rows):
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            position = file.tell()
+            block = b""
+            while position > 0 and block.count(b"\n") <= max_rows:
+                step = min(65536, position)
+                position -= step
+                file.seek(position)
+                block = file.read(step) + block
+        # Drop the partial line the backwards walk stopped in
+        self.offset = position + block.index(b"\n") + 1 if position > 0 else 0
+
+    def read_new_rows(self):
+        rows = self._read_file()
+        newest = self.newest_path()
+        if newest != self.file_path:
+            # A new UTC day started; the old file was just read to its end
+            self.file_path = newest
+            self.offset = 0
+            self.pending = b""
+            rows += self._read_file()
+        return rows
+
+    def _read_file(self):
+        if not os.path.exists(self.file_path):
+            return []
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:  # File was replaced or truncated; start over
+            self.offset = 0
+            self.pending = b""
+        if size == self.offset:
+            return []
+
+        with open(self.file_path, 'rb') as file:
+            file.seek(self.offset)
+            chunk = file.read(size - self.offset)
+        self.offset += len(chunk)
+
+        lines = (self.pending + chunk).split(b"\n")
+        self.pending = lines.pop()
+        lines = [line.decode() for line in lines if line.strip()]
+        return [row for row in csv.reader(lines) if row[0] != 'Open Time']
+
+    def read_new_bars(self):
+        bars = []
+        for row in self.read_new_rows():
+            try:
+                bars.append(parse_row(row))
+            except (ValueError, IndexError):
+                print(f"Skipping malformed row: {row}")
+        return bars
+
+# Bars pushed by the collector over the local bar bus, drained on the GUI thread. The bus does
+# not replay bars published before the subscriber (re)connects, so each connect also reads the
+# rows appended to the CSV since the last read; overlaps are dropped by timestamp.
+class BusSource:
+    def __init__(self, topic, tail, port=BUS_PORT):
+        self.tail = tail
+        self.connected = threading.Event()
+        self.queue = BarSubscriber([topic], port=port, on_connect=self.connected.set).start_queue()
+
+    def read_new_bars(self):
+        bars = []
+        if self.connected.is_set():
+            self.connected.clear()
+            bars.extend(self.tail.read_new_bars())
+        while True:
+            try:
+                _, bar = self.queue.get_nowait()
+            except queue.Empty:
+                return bars
+            x = mdates.date2num(datetime.fromtimestamp(bar['timestamp'] / 1000, tz=timezone.utc))
+            open_interest = bar['open_interest_usd'] if bar['open_interest_usd'] is not None else math.nan
+            bars.append((x, bar['open'], bar['high'], bar['low'], bar['close'], bar['volume_usd'], open_interest))
+
+# CSV row -> (x, open, high, low, close, volume_usd, open_interest_usd) with x as a matplotlib date number;
+# a bar recorded before any open interest was known has an empty cell, drawn as a gap (NaN)
+def parse_row(row):
+    x = mdates.date2num(datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S'))
+    return (x,) + tuple(float(value) for value in row[1:6]) + (float(row[6]) if row[6] else math.nan,)
+
+# Fixed-size window of the newest bars plus the artists that draw it; artists are updated in place
+class LiveChart:
+    def __init__(self, max_bars=MAX_BARS):
+        self.bars = deque(maxlen=max_bars)
+        self.fig, (self.ax1, self.ax2, self.ax3) = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
 
-        # Check if new rows have been added
-        if current_row_count > last_row_count:
-            print(f"New data detected: {current_row_count - last_row_count} new rows.")
-            last_row_count = current_row_count
-            df = new_df
+        self.wicks = LineCollection([], colors='black', linewidths=1)
+        self.bodies = PolyCollection([], edgecolors='black', linewidths=0.5)
+        self.volume_bars = PolyCollection([], facecolors='orange')
+        self.ax1.add_collection(self.wicks)
+        self.ax1.add_collection(self.bodies)
+        self.ax2.add_collection(self.volume_bars)
+        (self.oi_line,) = self.ax3.plot([], [], color='blue', label='Open Interest (USDT)')
 
-            ax1.clear()
-            ax2.clear()
-            ax3.clear()
+        self.ax1.set_title('Price (Candlestick Chart)')
+        self.ax2.set_ylabel('Volume (USDT)')
+        self.ax2.set_title('Volume Bar Chart')
+        self.ax3.set_ylabel('Open Interest (USDT)')
+        self.ax3.set_title('Open Interest Line Chart')
+        self.ax3.legend()
+        self.ax3.xaxis_date()
+        self.ax3.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+        plt.setp(self.ax3.get_xticklabels(), rotation=45)
+        self.fig.tight_layout()
 
-            df.set_index('timestamp', inplace=True)
+    @property
+    def artists(self):
+        return [self.wicks, self.bodies, self.volume_bars, self.oi_line]
 
-            # Plot candlestick chart
-            mpf.plot(df, type='candle', ax=ax1, volume=False, show_nontrading=True)
-            ax1.set_title('Price (Candlestick Chart)')
+    # Bar spacing in days, taken from the data (5 minutes until two bars are known)
+    def bar_width(self):
+        if len(self.bars) < 2:
+            return 5 / (24 * 60)
+        return self.bars[-1][0] - self.bars[-2][0]
 
-            # Plot volume as bar chart
-            ax2.bar(df.index, df['volume_usd'], color='orange', width=0.0005)
-            ax2.set_ylabel('Volume (USDT)')
-            ax2.set_title('Volume Bar Chart')
+    def append(self, bars):
+        for bar in bars:
+            if self.bars and bar[0] <= self.bars[-1][0]:
+                continue
+            self.bars.append(bar)
 
-            # Plot open interest as line chart
-            ax3.plot(df.index, df['open_interest_usd'], color='blue', label='Open Interest (USDT)')
-            ax3.set_ylabel('Open Interest (USDT)')
-            ax3.set_title('Open Interest Line Chart')
-            ax3.legend()
+    # Rebuild the collections from the bounded buffer; cost depends on max_bars, not on the file size
+    def refresh_artists(self):
+        half = self.bar_width() * 0.35
+        wicks, bodies, colors, volumes = [], [], [], []
+        for x, open_price, high, low, close, volume, _ in self.bars:
+            wicks.append([(x, low), (x, high)])
+            bodies.append([(x - half, open_price), (x - half, close), (x + half, close), (x + half, open_price)])
+            colors.append('green' if close >= open_price else 'red')
+            volumes.append([(x - half, 0), (x - half, volume), (x + half, volume), (x + half, 0)])
 
-            plt.xticks(rotation=45)
-            plt.tight_layout()
+        self.wicks.set_segments(wicks)
+        self.bodies.set_verts(bodies)
+        self.bodies.set_facecolors(colors)
+        self.volume_bars.set_verts(volumes)
+        self.oi_line.set_data([bar[0] for bar in self.bars], [bar[6] for bar in self.bars])
 
+    # Move the view only when the data leaves it; returns True if a full redraw is needed
+    def update_limits(self):
+        width = self.bar_width()
+        first, last = self.bars[0][0], self.bars[-1][0]
+        rescale = last + width > self.ax1.get_xlim()[1]
+
+        lows = [bar[3] for bar in self.bars]
+        highs = [bar[2] for bar in self.bars]
+        volumes = [bar[5] for bar in self.bars]
+        open_interest = [bar[6] for bar in self.bars if not math.isnan(bar[6])]
+        ranges = [
+            (self.ax1, min(lows), max(highs)),
+            (self.ax2, 0, max(volumes)),
+        ]
+        if open_interest:
+            ranges.append((self.ax3, min(open_interest), max(open_interest)))
+        for ax, low, high in ranges:
+            bottom, top = ax.get_ylim()
+            if low < bottom or high > top:
+                rescale = True
+
+        if rescale:
+            self.ax1.set_xlim(first - width, last + HEADROOM_BARS * width)
+            for ax, low, high in ranges:
+                pad = (high - low) * 0.1 or abs(high) * 0.01 or 1
+                ax.set_ylim(low - pad if ax is not self.ax2 else 0, high + pad)
+        return rescale
+
+# Animation callback: take only the new bars from the source and hand the changed artists back for blitting
+def update_plot(_, source, chart):
+    try:
+        bars = source.read_new_bars()
+        if not bars:
+            return []
+        chart.append(bars)
+        if not chart.bars:
+            return []
+        print(f"New data detected: {len(bars)} new rows.")
+
+        chart.refresh_artists()
+        if chart.update_limits():
+            # Ticks and labels are not blitted; redraw them and let the next blit cache the new background
+            chart.fig.canvas.draw()
     except Exception as e:
         print(f"Error during update: {e}")
+        return []
+    return chart.artists
+
+def main():
+    parser = argparse.ArgumentParser(description="Live candlestick, volume and open interest chart.")
+    parser.add_argument("--source", choices=["bus", "csv"], default="bus", help="Receive bars from the collector's bar bus, or tail the CSV file.")
+    parser.add_argument("--bus-port", type=int, default=BUS_PORT, help="Port of the collector's bar bus (default: %(default)s).")
+    parser.add_argument("--csv", type=str, default=CSV_FILE, help="CSV file the recorder writes (default: %(default)s).")
+    parser.add_argument("--rotate-daily", action="store_true", help="Follow the per-day files of a recorder started with --rotate-daily.")
+    args = parser.parse_args()
 
-# Set up the animation
-ani = FuncAnimation(fig, update_plot, interval=5000)  # Update every 5 seconds
+    tail = CsvTail(args.csv, args.rotate_daily)
+    tail.skip_to_last(MAX_BARS)
+    chart = LiveChart()
+
+    # History comes from the file, live bars from the bus; bars missed while the bus was down
+    # are read from the file again on every (re)connect
+    bus = BusSource(bar_topic('BTC-USDT-SWAP', '5m'), tail, args.bus_port) if args.source == "bus" else None
+    source = tail if bus is None else bus
+    if bus is not None:
+        update_plot(None, tail, chart)
+
+    # Set up the animation, blitting only the data artists
+    ani = FuncAnimation(
+        chart.fig,
+        update_plot,
+        fargs=(source, chart),
+        init_func=lambda: chart.artists,
+        interval=100 if bus is not None else 1000,  # Draining the bus queue is cheap, so check often
+        blit=True,
+        cache_frame_data=False,
+    )
+
+    # Show the plot
+    try:
+        plt.show(block=True)  # Block execution until the plot window is closed
+    except Exception as e:
+        print(f"An error occurred while showing the plot: {e}")
 
-# Show the plot
-try:
-    plt.show(block=True)  # Block execution until the plot window is closed
-except Exception as e:
-    print(f"An error occurred while showing the plot: {e}")
+    # Avoid using while True to prevent freezing
+    while plt.fignum_exists(chart.fig.number):  # Keep the script alive while the figure is open
+        time.sleep(1)  # Sleep to prevent CPU overload
 
-# Avoid using while True to prevent freezing
-while plt.fignum_exists(fig.number):  # Keep the script alive while the figure is open
-    time.sleep(1)  # Sleep to prevent CPU overload
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+
+# Local publish/subscribe channel for closed bars. The collector binds BUS_PORT on localhost
+# and pushes one JSON line per bar; the chart, a trade executor or a recorder connect and
+# receive every bar whose topic ("SYMBOL.timeframe") matches one of their prefixes.
+# Plain TCP on 127.0.0.1 so it works on Windows as well as Unix.
+BUS_HOST = "127.0.0.1"
+BUS_PORT = 5557
+
+def bar_topic(symbol, timeframe):
+    return f"{symbol}.{timeframe}"
+
+
+# Collector side: accepts subscribers in a background thread and fans bars out to them
+class BarPublisher:
+    def __init__(self, host=BUS_HOST, port=BUS_PORT):
+        self.server = socket.create_server((host, port))
+        self.subscribers = {}  # socket -> list of topic prefixes, empty meaning every topic
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return  # Server socket closed
+            threading.Thread(target=self._register, args=(connection,), daemon=True).start()
+
+    # The first line a subscriber sends is {"topics": [...]}
+    def _register(self, connection):
+        try:
+            connection.settimeout(5)
+            request = json.loads(connection.makefile('r').readline() or "{}")
+            connection.settimeout(1)  # A stalled subscriber is dropped instead of blocking the collector
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, ValueError):
+            connection.close()
+            return
+        with self.lock:
+            self.subscribers[connection] = request.get("topics") or []
+
+    def publish(self, symbol, timeframe, bar):
+        topic = bar_topic(symbol, timeframe)
+        message = (json.dumps({"topic": topic, "bar": bar}) + "\n").encode()
+        with self.lock:
+            for connection, topics in list(self.subscribers.items()):
+                if topics and not any(topic.startswith(prefix) for prefix in topics):
+                    continue
+                try:
+                    connection.sendall(message)
+                except OSError:
+                    # Subscriber went away; drop it without disturbing the others
+                    del self.subscribers[connection]
+                    connection.close()
+
+    def close(self):
+        self.server.close()
+        with self.lock:
+            for connection in self.subscribers:
+                connection.close()
+            self.subscribers.clear()
+
+
+# Subscriber side: yields (topic, bar) and reconnects if the collector restarts. Bars published
+# while it is disconnected are not replayed; on_connect is called after every (re)connect so the
+# caller can catch up from the collector's CSV.
+class BarSubscriber:
+    def __init__(self, topics=None, host=BUS_HOST, port=BUS_PORT, on_connect=None):
+        self.topics = topics or []
+        self.host = host
+        self.port = port
+        self.on_connect = on_connect
+        self.running = True
+
+    def __iter__(self):
+        backoff = 1
+        while self.running:
+            try:
+                with socket.create_connection((self.host, self.port)) as connection:
+                    connection.sendall((json.dumps({"topics": self.topics}) + "\n").encode())
+                    backoff = 1
+                    if self.on_connect is not None:
+                        self.on_connect()
+                    for line in connection.makefile('r'):
+                        if not self.running:
+                            return
+                        message = json.loads(line)
+                        yield message["topic"], message["bar"]
+            except OSError as e:
+                if not self.running:
+                    return
+                print(f"Bar bus unavailable ({e}). Reconnecting in {backoff} seconds...")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def stop(self):
+        self.running = False
+
+    # Feed bars into a queue from a daemon thread, for GUI loops that must stay on their own thread
+    def start_queue(self):
+        bars = queue.Queue()
+
+        def pump():
+            for topic, bar in self:
+                bars.put((topic, bar))
+
+        threading.Thread(target=pump, daemon=True).start()
+        return bars
+
+
+# Standalone subscriber: print every bar on the bus
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print closed bars published on the local bar bus.")
+    parser.add_argument("--topics", type=str, default="", help="Comma-separated topic prefixes, e.g. BTC-USDT-SWAP.5m (default: all).")
+    parser.add_argument("--port", type=int, default=BUS_PORT)
+    args = parser.parse_args()
+
+    topics = [topic for topic in args.topics.split(",") if topic]
+    for topic, bar in BarSubscriber(topics, port=args.port):
+        print(f"{topic}: {bar}")
@@ -0,0 +1,129 @@
+import os
+import sys
+import csv
+import time
+import threading
+import requests
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import okx_get
+
+SERVER_TIME_ENDPOINT = "/api/v5/public/time"
+
+RESYNC_INTERVAL = 900  # Seconds between server time measurements
+FINAL_APPROACH = 5  # Re-measure the clock this many seconds before a bar closes
+FIRST_RETRY = 0.05  # Seconds before the first retry of a bar that is not published yet
+FAST_RETRY_CAP = 0.25  # Retry at most this far apart while the bar is fresh...
+SLOW_RETRY_CAP = 2.0  # ...and back off further once it is FAST_RETRY_WINDOW seconds late
+FAST_RETRY_WINDOW = 5
+
+
+# OKX server time minus local time, in milliseconds, assuming the request and response take equally long
+def fetch_server_offset_ms(session=requests):
+    response = okx_get("https://www.okx.com" + SERVER_TIME_ENDPOINT, SERVER_TIME_ENDPOINT, session=session, timeout=5)
+    if response is None:
+        raise requests.exceptions.ConnectionError("no response from the server time endpoint")
+    response.raise_for_status()
+
+    # Round trip of the request that succeeded, not of the retries before it
+    received = time.time() * 1000
+    sent = received - response.elapsed.total_seconds() * 1000
+    server_ms = int(response.json()['data'][0]['ts'])
+    return server_ms - (sent + received) / 2
+
+
+# Local clock corrected to OKX server time, re-measured every RESYNC_INTERVAL seconds
+class ServerClock:
+    def __init__(self, resync_interval=RESYNC_INTERVAL):
+        self.resync_interval = resync_interval
+        self.offset_ms = 0
+        self.last_sync = None
+        self.lock = threading.Lock()
+
+    def sync(self):
+        try:
+            offset_ms = fetch_server_offset_ms()
+        except (requests.exceptions.RequestException, KeyError, IndexError, ValueError) as e:
+            print(f"Could not read OKX server time, keeping offset {self.offset_ms:.0f} ms: {e}")
+        else:
+            self.offset_ms = offset_ms
+        self.last_sync = time.monotonic()
+
+    def now_ms(self):
+        with self.lock:
+            if self.last_sync is None or time.monotonic() - self.last_sync > self.resync_interval:
+                self.sync()
+        return time.time() * 1000 + self.offset_ms
+
+    # Sleep until server_ms on the exchange clock; long waits re-measure the clock shortly before waking
+    def sleep_until(self, server_ms):
+        remaining = (server_ms - self.now_ms()) / 1000
+        if remaining > FINAL_APPROACH * 2:
+            time.sleep(remaining - FINAL_APPROACH)
+            with self.lock:
+                self.sync()
+            remaining = (server_ms - self.now_ms()) / 1000
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+# Wakes at each bar close on the exchange clock and polls until the closed bar is published.
+# The first poll waits for the learned publication lag; after that retries back off from
+# FIRST_RETRY. Each capture logs how long after the close the bar became available.
+class BarScheduler:
+    def __init__(self, bar_ms, clock=None, latency_log=None):
+        self.bar_ms = bar_ms
+        self.clock = clock or ServerClock()
+        self.latency_log = latency_log
+        self.publication_lag = 0.0  # Seconds after the close the exchange usually needs
+        self.lock = threading.Lock()
+
+    # Sleep until the next bar closes; returns the open time of the bar that just closed
+    def wait_for_close(self):
+        now = self.clock.now_ms()
+        close = now - now % self.bar_ms + self.bar_ms
+        self.clock.sleep_until(close)
+        return close - self.bar_ms
+
+    # Call fetch() until it returns something, giving up when the next bar closes.
+    # record=False leaves the latency bookkeeping to a later capture of the same bar.
+    def capture(self, bar_open_ms, fetch, label="", record=True):
+        close = bar_open_ms + self.bar_ms
+        deadline = close + self.bar_ms
+        if self.publication_lag > 0:
+            time.sleep(max(0, close + self.publication_lag * 1000 - self.clock.now_ms()) / 1000)
+
+        delay = FIRST_RETRY
+        attempts = 0
+        while True:
+            attempts += 1
+            result = fetch()
+            now = self.clock.now_ms()
+            if result is not None:
+                if record:
+                    self._record(bar_open_ms, label, attempts, now - close)
+                return result
+
+            late = (now - close) / 1000
+            if now + delay * 1000 >= deadline:
+                print(f"{label} gave up on bar {datetime.fromtimestamp(bar_open_ms / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} after {attempts} attempts.")
+                return None
+            time.sleep(delay)
+            delay = min(delay * 1.5, FAST_RETRY_CAP if late < FAST_RETRY_WINDOW else SLOW_RETRY_CAP)
+
+    def _record(self, bar_open_ms, label, attempts, latency_ms):
+        with self.lock:
+            # Aim the first poll a little before the bar usually shows up
+            target = max(latency_ms / 1000 - 0.2, 0)
+            self.publication_lag = 0.8 * self.publication_lag + 0.2 * target
+
+            bar_time = datetime.fromtimestamp(bar_open_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"{label} bar {bar_time} captured {latency_ms:.0f} ms after close ({attempts} attempts)".strip())
+            if self.latency_log:
+                new_file = not os.path.exists(self.latency_log)
+                with open(self.latency_log, mode='a', newline='') as file:
+                    writer = csv.writer(file)
+                    if new_file:
+                        writer.writerow(['Open Time', 'Series', 'Attempts', 'Latency (ms)'])
+                    writer.writerow([bar_time, label, attempts, round(latency_ms)])
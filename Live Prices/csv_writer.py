@@ -0,0 +1,145 @@
+import os
+import sys
+import csv
+import glob
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from storage import tail_lines
+
+HEADER = ['Open Time', 'Open', 'High', 'Low', 'Close', 'Quote Asset Volume', 'Open Interest (USD)']
+
+
+# Convert timestamp to human-readable format
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# Append-only bar writer that keeps one handle open for the life of the recorder.
+# On start it resumes after the last bar already in the file instead of truncating,
+# bars at or before that point are skipped so restarts never duplicate rows, and the
+# file is fsynced at most every fsync_interval seconds. With rotate_daily=True each UTC
+# day goes to its own {name}_YYYY-MM-DD.csv next to file_path.
+class LiveCsvWriter:
+    def __init__(self, file_path, fsync_interval=30, rotate_daily=False):
+        self.file_path = file_path
+        self.fsync_interval = fsync_interval
+        self.rotate_daily = rotate_daily
+        self.file = None
+        self.writer = None
+        self.current_path = None
+        self.last_fsync = time.monotonic()
+        self.last_timestamp = self._resume_timestamp()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Path the bar at timestamp belongs in
+    def path_for(self, timestamp):
+        if not self.rotate_daily:
+            return self.file_path
+        root, ext = os.path.splitext(self.file_path)
+        day = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        return f"{root}_{day}{ext}"
+
+    # Write one closed bar; returns False if it was already stored
+    def write(self, timestamp, open_price, high_price, low_price, close_price, volume_usd, open_interest_usd):
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+
+        path = self.path_for(timestamp)
+        if path != self.current_path:
+            self._open(path)
+
+        self.writer.writerow([
+            format_timestamp(timestamp),
+            open_price,
+            high_price,
+            low_price,
+            close_price,
+            volume_usd,
+            open_interest_usd
+        ])
+        # Flush every row so readers tailing the file see it immediately; fsync on a timer
+        self.file.flush()
+        if time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+        self.last_timestamp = timestamp
+        return True
+
+    def sync(self):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def _open(self, path):
+        self.close()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, mode='a', newline='')
+        self.writer = csv.writer(self.file)
+        self.current_path = path
+        if new_file:
+            self.writer.writerow(HEADER)
+
+    # Newest bar already on disk, from the tail of the (latest rotated) file
+    def _resume_timestamp(self):
+        if self.rotate_daily:
+            root, ext = os.path.splitext(self.file_path)
+            candidates = sorted(glob.glob(f"{root}_????-??-??{ext}"), reverse=True)
+        else:
+            candidates = [self.file_path]
+
+        for path in candidates:
+            if not os.path.exists(path):
+                continue
+            _drop_torn_row(path)
+            # Newest line first; one that does not parse is skipped for the complete one before it
+            for line in reversed(tail_lines(path, 2, HEADER[0])):
+                try:
+                    open_time = datetime.strptime(line.split(",")[0], '%Y-%m-%d %H:%M:%S')
+                except ValueError:
+                    print(f"Skipping unreadable last line of {path}: {line!r}")
+                    continue
+                return int(open_time.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        return None
+
+
+# Cut off a last row that was only partly written when the recorder died, so the next row is
+# not appended onto it; the bar itself is fetched again by the backfill
+def _drop_torn_row(file_path):
+    with open(file_path, 'rb+') as file:
+        position = file.seek(0, os.SEEK_END)
+        if position == 0:
+            return
+        file.seek(position - 1)
+        if file.read(1) == b"\n":
+            return
+
+        # Walk backwards to the end of the last complete line
+        end = 0
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            file.seek(position)
+            newline = file.read(step).rfind(b"\n")
+            if newline != -1:
+                end = position + newline + 1
+                break
+        file.truncate(end)
+    print(f"Removed a partly written last row from {file_path}.")
@@ -0,0 +1,186 @@
+import os
+import asyncio
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+# One shared ccxt client for every series; markets are loaded once at startup
+from okx_data import (
+    exchange,
+    TIMEFRAME_MS,
+    format_timestamp,
+    fetch_previous_candle,
+    fetch_open_interest_for_candle,
+    fetch_missing_bars,
+)
+from okx_ws import BUSINESS_URL, PUBLIC_URL, OkxBarStream
+from csv_writer import LiveCsvWriter
+from bar_bus import BUS_PORT, BarPublisher
+from bar_scheduler import BarScheduler, ServerClock
+
+SYMBOLS = ["BTC-USDT-SWAP", "ETH-USDT-SWAP", "BNB-USDT-SWAP", "SOL-USDT-SWAP", "PEPE-USDT-SWAP"]
+TIMEFRAMES = ["5m", "1h"]
+
+
+# One symbol/timeframe pair, the CSV it writes to and the bar bus it publishes on
+class Series:
+    def __init__(self, symbol, timeframe, output_dir=".", rotate_daily=False, publisher=None, writer=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.publisher = publisher
+        if writer is None:
+            symbol_name = symbol.replace('-USDT-SWAP', '')
+            file_path = os.path.join(output_dir, f"Live_Candlestick_Data_{symbol_name}_{timeframe}.csv")
+            # Resumes after the last stored bar; an existing series is never truncated
+            writer = LiveCsvWriter(file_path, rotate_daily=rotate_daily)
+        self.writer = writer
+        self.file_path = writer.file_path
+        self.lock = threading.Lock()  # Captures of consecutive bars can overlap
+
+    def write(self, bar, open_interest_usd):
+        if not self.writer.write(bar['timestamp'], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume_usd'], open_interest_usd):
+            return
+        if self.publisher is not None:
+            self.publisher.publish(self.symbol, self.timeframe, {
+                'timestamp': bar['timestamp'],
+                'open': bar['open'],
+                'high': bar['high'],
+                'low': bar['low'],
+                'close': bar['close'],
+                'volume_usd': bar['volume_usd'],
+                'open_interest_usd': float(open_interest_usd) if open_interest_usd is not None else None,
+            })
+        print(f"{self.symbol} {self.timeframe} written: Time: {format_timestamp(bar['timestamp'])} - CLOSE: {bar['close']} VOLUME (USD): {bar['volume_usd']} OPEN INTEREST (USD): {open_interest_usd}")
+
+    # Store any bars missed since the last stored one before the bar opened at until_ts
+    def backfill(self, until_ts):
+        if self.writer.last_timestamp is None:
+            return
+        missing = fetch_missing_bars(exchange, self.symbol, self.timeframe, self.writer.last_timestamp, until_ts)
+        for bar in missing:
+            self.write(bar, bar['open_interest_usd'])
+        if missing:
+            print(f"{self.symbol} {self.timeframe}: backfilled {len(missing)} missing bars.")
+
+    # Store a streamed bar after whatever was missed before it
+    def store(self, bar):
+        with self.lock:
+            # A dropped connection shows up as a jump in timestamps; fill it over REST first
+            self.backfill(bar['timestamp'])
+            # None until the first open interest snapshot arrives; stored as an empty cell, not as 0
+            self.write(bar, bar['open_interest_usd'])
+
+
+# Fetch and store the bar opened at since for one series, retrying until it is published
+def collect_bar(series, scheduler, since):
+    label = f"{series.symbol} {series.timeframe}"
+    # Close any gap left by earlier cycles first, even if this bar's capture fails below
+    with series.lock:
+        series.backfill(since)
+
+    candle = scheduler.capture(since, lambda: fetch_previous_candle(series.symbol, series.timeframe, since), label, record=False)
+    if candle is None:
+        print(f"{series.symbol} {series.timeframe}: candle was not published before the next bar closed.")
+        return
+
+    open_interest_data = scheduler.capture(since, lambda: fetch_open_interest_for_candle(series.symbol, since, series.timeframe), label)
+    if open_interest_data is None:
+        print(f"{series.symbol} {series.timeframe}: no open interest data available for the candle.")
+        return
+
+    # Calculate volume in USD using the closing price
+    candle['volume_usd'] = candle['volume_coin'] * candle['close']
+    with series.lock:
+        series.write(candle, open_interest_data[3])
+
+
+# Report a capture that died with an exception; otherwise the executor would swallow it
+def report_failure(series, future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"{series.symbol} {series.timeframe}: error collecting bar: {future.exception()}")
+
+
+# Shared scheduler: wake at the next bar boundary of any timeframe on the OKX server clock
+# and collect every series that just closed
+def run_polling(series_list, max_workers=16, latency_log=None):
+    clock = ServerClock()
+    schedulers = {tf: BarScheduler(TIMEFRAME_MS[tf], clock, latency_log) for tf in {s.timeframe for s in series_list}}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            now_ms = clock.now_ms()
+            next_boundary = min(now_ms - now_ms % TIMEFRAME_MS[s.timeframe] + TIMEFRAME_MS[s.timeframe] for s in series_list)
+            clock.sleep_until(next_boundary)
+
+            # Captures may keep retrying into the next bar, so do not wait for them here
+            for s in series_list:
+                if next_boundary % TIMEFRAME_MS[s.timeframe] == 0:
+                    future = executor.submit(collect_bar, s, schedulers[s.timeframe], next_boundary - TIMEFRAME_MS[s.timeframe])
+                    future.add_done_callback(lambda future, s=s: report_failure(s, future))
+
+
+# One WebSocket stream per timeframe, all symbols multiplexed on it, in a single event loop.
+# Storing a bar may mean a blocking REST backfill, so it runs in a worker thread; the lock per
+# series keeps its bars in arrival order while other series and the connections carry on.
+async def run_websocket(series_list, business_url=BUSINESS_URL, public_url=PUBLIC_URL):
+    by_key = {(s.symbol, s.timeframe): s for s in series_list}
+    locks = {key: asyncio.Lock() for key in by_key}
+    streams = []
+    for timeframe in sorted({s.timeframe for s in series_list}):
+        symbols = [s.symbol for s in series_list if s.timeframe == timeframe]
+
+        async def on_bar(symbol, bar, timeframe=timeframe):
+            async with locks[(symbol, timeframe)]:
+                await asyncio.to_thread(by_key[(symbol, timeframe)].store, bar)
+
+        streams.append(OkxBarStream(symbols, timeframe, on_bar, business_url, public_url))
+    await asyncio.gather(*(stream.run() for stream in streams))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record live OKX candles with open interest for many symbols in one process.")
+    parser.add_argument("--symbols", type=str, default=",".join(SYMBOLS), help="Comma-separated OKX instrument IDs.")
+    parser.add_argument("--timeframes", type=str, default=",".join(TIMEFRAMES), help="Comma-separated timeframes, e.g. 5m,1h.")
+    parser.add_argument("--output-dir", type=str, default=".", help="Directory for the per-series CSV files.")
+    parser.add_argument("--ws", action="store_true", help="Stream confirmed bars over WebSocket instead of polling REST.")
+    parser.add_argument("--ws-url", type=str, default=None, help="Override both WebSocket endpoints, e.g. a local mock_okx_ws.py server.")
+    parser.add_argument("--rotate-daily", action="store_true", help="Write each UTC day of a series to its own file.")
+    parser.add_argument("--bus-port", type=int, default=BUS_PORT, help="Local port closed bars are published on (default: %(default)s).")
+    parser.add_argument("--no-bus", action="store_true", help="Do not publish bars on the local bar bus.")
+    parser.add_argument("--latency-log", type=str, default=None, help="CSV file to record per-bar fetch latency in.")
+    args = parser.parse_args()
+
+    publisher = None
+    if not args.no_bus:
+        try:
+            publisher = BarPublisher(port=args.bus_port)
+        except OSError as e:
+            print(f"Could not start the bar bus on port {args.bus_port}: {e}. Continuing without it.")
+
+    series_list = [
+        Series(symbol, timeframe, args.output_dir, args.rotate_daily, publisher)
+        for symbol in args.symbols.split(",")
+        for timeframe in args.timeframes.split(",")
+    ]
+
+    # Fill whatever closed while the collector was down
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    for series in series_list:
+        bar_ms = TIMEFRAME_MS[series.timeframe]
+        series.backfill(now_ms - now_ms % bar_ms)
+
+    try:
+        if args.ws:
+            asyncio.run(run_websocket(series_list, args.ws_url or BUSINESS_URL, args.ws_url or PUBLIC_URL))
+        else:
+            exchange.load_markets()
+            print(f"Collecting {len(series_list)} series from one process...")
+            run_polling(series_list, latency_log=args.latency_log)
+    finally:
+        for series in series_list:
+            series.writer.close()
+
+
+if __name__ == "__main__":
+    main()
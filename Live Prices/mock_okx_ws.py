@@ -0,0 +1,90 @@
+import asyncio
+import json
+import random
+import argparse
+import websockets
+from datetime import datetime, timezone
+
+
+# Local stand-in for the OKX v5 WebSocket: answers pings and subscriptions and
+# broadcasts whatever candles and open interest snapshots are pushed to it
+class MockOkxServer:
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.host = host
+        self.port = port
+        self.subscribers = {}  # (channel, instId) -> set of connections
+        self.server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # The port picked by the OS for port=0
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handler(self, ws):
+        try:
+            async for message in ws:
+                if message == "ping":
+                    await ws.send("pong")
+                    continue
+                request = json.loads(message)
+                if request.get("op") == "subscribe":
+                    for arg in request["args"]:
+                        self.subscribers.setdefault((arg["channel"], arg["instId"]), set()).add(ws)
+                        await ws.send(json.dumps({"event": "subscribe", "arg": arg}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for connections in self.subscribers.values():
+                connections.discard(ws)
+
+    async def _broadcast(self, channel, symbol, data):
+        message = json.dumps({"arg": {"channel": channel, "instId": symbol}, "data": data})
+        for ws in list(self.subscribers.get((channel, symbol), ())):
+            await ws.send(message)
+
+    # Push one candle; confirmed=True marks it as closed like OKX does at the bar boundary
+    async def push_candle(self, symbol, channel, timestamp, open_price, high, low, close, volume_coin, confirmed=True):
+        row = [
+            str(timestamp), str(open_price), str(high), str(low), str(close),
+            str(volume_coin), str(volume_coin), str(volume_coin * close), "1" if confirmed else "0",
+        ]
+        await self._broadcast(channel, symbol, [row])
+
+    async def push_open_interest(self, symbol, oi, oi_ccy, oi_usd, timestamp=None):
+        timestamp = timestamp or int(datetime.now(timezone.utc).timestamp() * 1000)
+        snapshot = {"instType": "SWAP", "instId": symbol, "oi": str(oi), "oiCcy": str(oi_ccy), "oiUsd": str(oi_usd), "ts": str(timestamp)}
+        await self._broadcast("open-interest", symbol, [snapshot])
+
+
+# Standalone mode: serve a random walk so the live scripts can be run against it with --ws-url
+async def serve_random_walk(symbol, channel, bar_seconds, port):
+    server = await MockOkxServer(port=port).start()
+    print(f"Mock OKX WebSocket listening on {server.url}")
+
+    price = 60000.0
+    timestamp = int(datetime.now(timezone.utc).timestamp() // bar_seconds * bar_seconds * 1000)
+    while True:
+        await asyncio.sleep(bar_seconds)
+        open_price = price
+        price *= 1 + random.gauss(0, 0.002)
+        await server.push_open_interest(symbol, 2_500_000, 25_000, 25_000 * price)
+        await server.push_candle(symbol, channel, timestamp, open_price, max(open_price, price) * 1.001, min(open_price, price) * 0.999, price, random.uniform(10, 100))
+        timestamp += bar_seconds * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock of the OKX WebSocket API.")
+    parser.add_argument("--symbol", type=str, default="BTC-USDT-SWAP")
+    parser.add_argument("--channel", type=str, default="candle5m")
+    parser.add_argument("--bar-seconds", type=int, default=5, help="Seconds between synthetic bars.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(serve_random_walk(args.symbol, args.channel, args.bar_seconds, args.port))
@@ -1,8 +1,13 @@
+import os
+import sys
 import ccxt
-import requests
-import time
 from datetime import datetime, timedelta, timezone
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import okx_get
+from bar_scheduler import BarScheduler
+from okx_backfill import OPEN_INTEREST_ENDPOINT, closed_candles, fetch_missing_bars
+
 # Initialize OKX Futures exchange instance with max precision
 exchange = ccxt.okx({
     'options': {
@@ -12,33 +17,30 @@ exchange = ccxt.okx({
 })
 
 # Fetch the previous 1-hour candlestick data for perpetual contract
-def fetch_previous_candle(symbol='BTC-USDT-SWAP'):
+def fetch_previous_candle(symbol='BTC-USDT-SWAP', since=None):
     now = datetime.now(timezone.utc)
     # Calculate the time for the candle that just completed (rounding down to the nearest hour)
-    last_completed_hour = (now - timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-    since = int(last_completed_hour.timestamp() * 1000)
+    if since is None:
+        last_completed_hour = (now - timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        since = int(last_completed_hour.timestamp() * 1000)
 
     try:
-        time.sleep(1)
         candles = exchange.fetch_ohlcv(symbol, timeframe='1h', since=since)
 
-        if len(candles) > 0:
-            previous_candle = candles[-1]
-            if previous_candle[0] == since:
-                volume_usd = previous_candle[4] * previous_candle[5]
-                return {
-                    'timestamp': previous_candle[0],
-                    'open': previous_candle[1],
-                    'high': previous_candle[2],
-                    'low': previous_candle[3],
-                    'close': previous_candle[4],
-                    'volume_coin': previous_candle[5],
-                    'volume_usd': volume_usd
-                }
-            else:
-                return None
-        else:
+        # OKX also returns the bar that is still forming, so pick the closed one by its open time
+        previous_candle = next((candle for candle in closed_candles(candles, '1h') if candle[0] == since), None)
+        if previous_candle is None:
             return None
+        volume_usd = previous_candle[4] * previous_candle[5]
+        return {
+            'timestamp': previous_candle[0],
+            'open': previous_candle[1],
+            'high': previous_candle[2],
+            'low': previous_candle[3],
+            'close': previous_candle[4],
+            'volume_coin': previous_candle[5],
+            'volume_usd': volume_usd
+        }
     except Exception as e:
         print(f"Error fetching candle: {e}")
         return None
@@ -48,7 +50,7 @@ def fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=None
     if candle_timestamp is None:
         return None
 
-    url = "https://www.okx.com/api/v5/rubik/stat/contracts/open-interest-history"
+    url = "https://www.okx.com" + OPEN_INTEREST_ENDPOINT
 
     # Use the candle's timestamp to fetch Open Interest for that specific timeframe
     start_ts = candle_timestamp  # The start of the candle
@@ -62,15 +64,16 @@ def fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=None
         "limit": "1"  # Fetch only one data point for the specific period
     }
 
-    response = requests.get(url, params=params)
+    response = okx_get(url, OPEN_INTEREST_ENDPOINT, params)
 
+    if response is None:
+        return None  # Every attempt failed and was reported
     if response.status_code == 200:
         data = response.json()
         if 'data' in data and data['data']:
             return data['data'][0]  # Return the first entry that matches the timestamp
         else:
-            print(f"No open interest data found for timestamp {candle_timestamp}")
-            return None
+            return None  # Not published yet; the caller retries
     else:
         print(f"Error fetching open interest: {response.status_code} - {response.text}")
         return None
@@ -83,16 +86,31 @@ def format_timestamp(timestamp):
 def get_current_utc_time():
     return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
 
+# Wake at each bar close on the OKX server clock and retry until the bar is published
+scheduler = BarScheduler(60 * 60 * 1000)
+
+# Open time of the last bar shown, so missed bars can be filled in
+last_timestamp = None
+
 # Example usage to fetch and display the previous candle along with open interest
 while True:
+    since = scheduler.wait_for_close()
     current_utc_time = get_current_utc_time()  
+
+    # Bars missed by earlier cycles, in one ranged request, before the current one is captured
+    if last_timestamp is not None:
+        for bar in fetch_missing_bars(exchange, 'BTC-USDT-SWAP', '1h', last_timestamp, since):
+            print(f"Backfilled Candle: Time: {format_timestamp(bar['timestamp'])} - OPEN: {bar['open']} HIGH: {bar['high']} LOW: {bar['low']} CLOSE: {bar['close']} VOLUME (USD): {bar['volume_usd']} OPEN INTEREST (USD): {bar['open_interest_usd']}")
+            last_timestamp = bar['timestamp']
     
-    candle = fetch_previous_candle()
+    candle = scheduler.capture(since, lambda: fetch_previous_candle(since=since), 'BTC-USDT-SWAP 1H', record=False)
     
     if candle:
-        open_interest_data = fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=candle['timestamp'])
+        open_interest_data = scheduler.capture(since, lambda: fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=since), 'BTC-USDT-SWAP 1H')
 
         if open_interest_data:
+            last_timestamp = since
+
             human_readable_timestamp = format_timestamp(candle['timestamp'])
             # Open interest data can be unpacked accordingly
             open_interest_contracts = open_interest_data[1]  # Open Interest in Contracts
@@ -102,9 +120,4 @@ while True:
             print("No open interest data available for the candle.")
 
     else:
-        print("Waiting for Current Candle Closing.")
-
-    # Sleep until the start of the next hour
-    current_time = datetime.now(timezone.utc)
-    seconds_to_next_hour = (60 - current_time.minute) * 60 - current_time.second - current_time.microsecond / 1_000_000
-    time.sleep(seconds_to_next_hour)
+        print("Candle was not published before the next bar closed.")
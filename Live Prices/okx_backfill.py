@@ -0,0 +1,107 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import okx_get
+
+# Ranged REST fetches for filling gaps in a live series. Kept apart from okx_data.py so the
+# print-only live scripts can use them without the WebSocket, bar bus and CSV writer stack;
+# callers pass in their own ccxt client.
+
+OPEN_INTEREST_ENDPOINT = "/api/v5/rubik/stat/contracts/open-interest-history"
+OPEN_INTEREST_PAGE_LIMIT = 100  # Maximum records per open interest history request
+CANDLE_PAGE_LIMIT = 100  # Maximum candles per OKX history candles request
+
+# Candle length per timeframe, in milliseconds
+TIMEFRAME_MS = {
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+}
+
+# ccxt timeframe -> OKX open interest period
+OPEN_INTEREST_PERIODS = {'5m': '5m', '15m': '15m', '1h': '1H', '4h': '4H', '1d': '1D'}
+
+# Candles that had closed by now_ms. OKX also returns the bar that is still forming; stored,
+# it would stay in the CSV for good, since the writer skips the real bar at the same timestamp.
+def closed_candles(candles, timeframe, now_ms=None):
+    if now_ms is None:
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    return [candle for candle in candles if candle[0] + TIMEFRAME_MS[timeframe] <= now_ms]
+
+# Fetch open interest for every period in [start_ts, end_ts], keyed by timestamp,
+# one request per OPEN_INTEREST_PAGE_LIMIT periods
+def fetch_open_interest_range(symbol='BTC-USDT-SWAP', start_ts=None, end_ts=None, timeframe='5m'):
+    url = "https://www.okx.com" + OPEN_INTEREST_ENDPOINT
+    page_ms = OPEN_INTEREST_PAGE_LIMIT * TIMEFRAME_MS[timeframe]
+    records = {}
+
+    for begin in range(start_ts, end_ts + 1, page_ms):
+        params = {
+            "instId": symbol,
+            "period": OPEN_INTEREST_PERIODS[timeframe],
+            "begin": str(begin),
+            "end": str(min(begin + page_ms - 1, end_ts)),
+            "limit": str(OPEN_INTEREST_PAGE_LIMIT)
+        }
+
+        response = okx_get(url, OPEN_INTEREST_ENDPOINT, params)
+
+        if response is None or response.status_code != 200:
+            error = f"{response.status_code} - {response.text}" if response is not None else "no response"
+            print(f"Error fetching open interest from {datetime.fromtimestamp(begin / 1000, tz=timezone.utc):%Y-%m-%d %H:%M:%S}, these bars get no open interest: {error}")
+            continue
+        for record in response.json().get('data', []):
+            records[int(record[0])] = record
+
+    return records
+
+# Fetch every candle opened in [start_ts, end_ts], paging forward from the last candle received
+def fetch_candle_range(exchange, symbol='BTC-USDT-SWAP', timeframe='5m', start_ts=None, end_ts=None):
+    candles = []
+    since = start_ts
+    while since <= end_ts:
+        try:
+            page = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=CANDLE_PAGE_LIMIT)
+        except Exception as e:
+            print(f"Error fetching candles: {e}")
+            break
+
+        page = [candle for candle in page if since <= candle[0] <= end_ts]
+        if not page:
+            break
+        candles.extend(page)
+        since = page[-1][0] + TIMEFRAME_MS[timeframe]
+    return candles
+
+# Bars after last_timestamp and before until_ts that were never stored, with their open interest;
+# one ranged candle request and one ranged open interest request per 100 missing bars
+def fetch_missing_bars(exchange, symbol, timeframe, last_timestamp, until_ts):
+    bar_ms = TIMEFRAME_MS[timeframe]
+    start_ts = last_timestamp + bar_ms
+    end_ts = until_ts - bar_ms
+    if start_ts > end_ts:
+        return []
+
+    candles = closed_candles(fetch_candle_range(exchange, symbol, timeframe, start_ts, end_ts), timeframe)
+    if not candles:
+        return []
+    open_interest = fetch_open_interest_range(symbol, start_ts, end_ts, timeframe)
+
+    bars = []
+    for timestamp, open_price, high_price, low_price, close_price, volume in candles:
+        open_interest_data = open_interest.get(timestamp)
+        bars.append({
+            'timestamp': timestamp,
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'close': close_price,
+            'volume_coin': volume,
+            'volume_usd': volume * close_price,
+            'open_interest_usd': open_interest_data[3] if open_interest_data else 0,
+        })
+    return bars
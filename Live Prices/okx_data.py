@@ -1,8 +1,24 @@
+import os
+import sys
+import asyncio
+import argparse
 import ccxt
-import requests
-import time
-import csv
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from rate_limiter import okx_get
+from okx_ws import BUSINESS_URL, PUBLIC_URL
+from csv_writer import LiveCsvWriter, format_timestamp
+from bar_bus import BUS_PORT, BarPublisher
+from bar_scheduler import BarScheduler
+from okx_backfill import (
+    OPEN_INTEREST_ENDPOINT,
+    TIMEFRAME_MS,
+    OPEN_INTEREST_PERIODS,
+    closed_candles,
+    fetch_open_interest_range,
+    fetch_missing_bars,
+)
 
 # Initialize OKX Futures exchange instance with max precision
 exchange = ccxt.okx({
@@ -15,86 +31,74 @@ exchange = ccxt.okx({
 # CSV file path
 csv_file_path = 'Live_Candlestick_Data.csv'
 
-# Write CSV header and clear previous data
-def initialize_csv():
-    with open(csv_file_path, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Open Time', 'Open', 'High', 'Low', 'Close', 'Quote Asset Volume', 'Open Interest (USD)'])
-
-# Convert timestamp to human-readable format
-def format_timestamp(timestamp):
-    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-
 # Fetch multiple closed candles data
-def fetch_recent_candles(symbol='BTC-USDT-SWAP', count=100):
-    now = datetime.now(timezone.utc)
-    since = int((now - timedelta(minutes=count * 5)).timestamp() * 1000)  # Fetch candles from the past
+def fetch_recent_candles(symbol='BTC-USDT-SWAP', count=100, timeframe='5m'):
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    since = now_ms - (count + 1) * TIMEFRAME_MS[timeframe]  # One extra bar for the forming one dropped below
 
     try:
-        candles = exchange.fetch_ohlcv(symbol, timeframe='5m', since=since, limit=count)
-        return candles
+        candles = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=count + 1)
+        return closed_candles(candles, timeframe, now_ms)[-count:]
     except Exception as e:
         print(f"Error fetching recent candles: {e}")
         return []
 
-# Fetch the previous 5-minute candlestick data for perpetual contract
-def fetch_previous_candle(symbol='BTC-USDT-SWAP'):
-    now = datetime.now(timezone.utc)
-    last_completed_minute = (now - timedelta(minutes=5)).replace(second=0, microsecond=0)
-    last_completed_5min = last_completed_minute - timedelta(minutes=last_completed_minute.minute % 5)
-    since = int(last_completed_5min.timestamp() * 1000)
+# Fetch the previous completed candlestick (5-minute by default) for perpetual contract;
+# None until the exchange has published it
+def fetch_previous_candle(symbol='BTC-USDT-SWAP', timeframe='5m', since=None):
+    if since is None:
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        bar_ms = TIMEFRAME_MS[timeframe]
+        since = now_ms - now_ms % bar_ms - bar_ms  # Start of the last completed bar
 
     try:
-        time.sleep(1)
-        candles = exchange.fetch_ohlcv(symbol, timeframe='5m', since=since)
-
-        if len(candles) > 0:
-            previous_candle = candles[-1]
-            if previous_candle[0] == since:
-                volume_usd = previous_candle[4] * previous_candle[5]  # This line can be omitted if you're recalculating below
-                return {
-                    'timestamp': previous_candle[0],
-                    'open': previous_candle[1],
-                    'high': previous_candle[2],
-                    'low': previous_candle[3],
-                    'close': previous_candle[4],
-                    'volume_coin': previous_candle[5],
-                    'volume_usd': volume_usd
-                }
-            else:
-                return None
-        else:
+        candles = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since)
+
+        # OKX also returns the bar that is still forming, so pick the closed one by its open time
+        previous_candle = next((candle for candle in closed_candles(candles, timeframe) if candle[0] == since), None)
+        if previous_candle is None:
             return None
+        volume_usd = previous_candle[4] * previous_candle[5]  # This line can be omitted if you're recalculating below
+        return {
+            'timestamp': previous_candle[0],
+            'open': previous_candle[1],
+            'high': previous_candle[2],
+            'low': previous_candle[3],
+            'close': previous_candle[4],
+            'volume_coin': previous_candle[5],
+            'volume_usd': volume_usd
+        }
     except Exception as e:
         print(f"Error fetching candle: {e}")
         return None
 
 # Fetch Open Interest for a specific timestamp
-def fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=None):
+def fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=None, timeframe='5m'):
     if candle_timestamp is None:
         return None
 
-    url = "https://www.okx.com/api/v5/rubik/stat/contracts/open-interest-history"
+    url = "https://www.okx.com" + OPEN_INTEREST_ENDPOINT
     start_ts = candle_timestamp
-    end_ts = start_ts + 5 * 60 * 1000  # The end of the candle (5 minutes later)
+    end_ts = start_ts + TIMEFRAME_MS[timeframe]  # The end of the candle
 
     params = {
         "instId": symbol,
-        "period": "5m",
+        "period": OPEN_INTEREST_PERIODS[timeframe],
         "begin": str(start_ts),
         "end": str(end_ts),
         "limit": "1"
     }
 
-    response = requests.get(url, params=params)
+    response = okx_get(url, OPEN_INTEREST_ENDPOINT, params)
 
+    if response is None:
+        return None  # Every attempt failed and was reported
     if response.status_code == 200:
         data = response.json()
         if 'data' in data and data['data']:
             return data['data'][0]
         else:
-            print(f"No open interest data found for timestamp {candle_timestamp}")
-            return None
+            return None  # Not published yet; the caller decides whether to retry
     else:
         print(f"Error fetching open interest: {response.status_code} - {response.text}")
         return None
@@ -103,69 +107,126 @@ def fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=None
 def get_current_utc_time():
     return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
 
-# Initialize CSV file
-initialize_csv()
+# Fetch and record the last 100 closed candles
+def write_recent_candles(writer, publisher=None):
+    recent_candles = fetch_recent_candles()
 
-# Fetch and write the last 100 closed candles
-recent_candles = fetch_recent_candles()
+    if recent_candles:
+        # Open interest for the whole window in one or two range requests, joined on the candle timestamp
+        open_interest = fetch_open_interest_range(start_ts=recent_candles[0][0], end_ts=recent_candles[-1][0])
 
-if recent_candles:
-    with open(csv_file_path, mode='a', newline='') as file:
-        writer = csv.writer(file)
+        written = 0
         for candle in recent_candles:
             timestamp, open_price, high_price, low_price, close_price, volume = candle
-            open_interest_data = fetch_open_interest_for_candle(candle_timestamp=timestamp)
+            open_interest_data = open_interest.get(timestamp)
             open_interest_usd = open_interest_data[3] if open_interest_data else 0
             
             # Calculate volume in USD using the closing price
             volume_usd = volume * close_price  # or use another price for better accuracy
             
-            writer.writerow([
-                format_timestamp(timestamp),
-                open_price,
-                high_price,
-                low_price,
-                close_price,
-                volume_usd,
-                open_interest_usd
-            ])
-    print(f"Wrote {len(recent_candles)} recent candles to CSV.")
+            written += record_bar(writer, publisher, timestamp, open_price, high_price, low_price, close_price, volume_usd, open_interest_usd)
+        print(f"Wrote {written} recent candles to CSV ({len(recent_candles) - written} already stored).")
+
+# Store a closed bar and announce it to bar bus subscribers (chart, trade executor, recorders);
+# returns False if the bar was already stored
+def record_bar(writer, publisher, timestamp, open_price, high_price, low_price, close_price, volume_usd, open_interest_usd):
+    if not writer.write(timestamp, open_price, high_price, low_price, close_price, volume_usd, open_interest_usd):
+        return False
+    if publisher is not None:
+        publisher.publish('BTC-USDT-SWAP', '5m', {
+            'timestamp': timestamp,
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'close': close_price,
+            'volume_usd': volume_usd,
+            'open_interest_usd': float(open_interest_usd) if open_interest_usd is not None else None,
+        })
+    return True
+
+# Store any bars missed since the last stored one (failed fetch, restart, reconnect) before the bar opened at until_ts
+def backfill(writer, publisher, until_ts, symbol='BTC-USDT-SWAP', timeframe='5m'):
+    if writer.last_timestamp is None:
+        return
+    missing = fetch_missing_bars(exchange, symbol, timeframe, writer.last_timestamp, until_ts)
+    for bar in missing:
+        record_bar(writer, publisher, bar['timestamp'], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume_usd'], bar['open_interest_usd'])
+    if missing:
+        print(f"Backfilled {len(missing)} missing bars from {format_timestamp(missing[0]['timestamp'])} to {format_timestamp(missing[-1]['timestamp'])}.")
 
 # Continuously fetch data and store in CSV
-while True:
-    candle = fetch_previous_candle()
+def run_polling(writer, publisher=None, latency_log=None):
+    # Wakes on the OKX server clock and retries until the closed bar is published
+    scheduler = BarScheduler(TIMEFRAME_MS['5m'], latency_log=latency_log)
 
-    if candle:
-        open_interest_data = fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=candle['timestamp'])
+    while True:
+        since = scheduler.wait_for_close()
 
-        if open_interest_data:
-            open_interest_usd = open_interest_data[3]  # Open Interest in USD
-            
-            # Fetch the latest price for accurate volume calculation
-            latest_price = candle['close']  # Or fetch latest price from the exchange for more accuracy
+        # Close any gap left by earlier cycles first, even if this bar's capture fails below
+        backfill(writer, publisher, since)
 
-            # Calculate volume in USD using the latest price
-            volume_usdt = candle['volume_coin'] * latest_price
-            
-            # Append the new data to the CSV file
-            with open(csv_file_path, mode='a', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    format_timestamp(candle['timestamp']),
-                    candle['open'],
-                    candle['high'],
-                    candle['low'],
-                    candle['close'],
-                    volume_usdt,
-                    open_interest_usd
-                ])
-            print(f"Data written to CSV: Time: {format_timestamp(candle['timestamp'])} - OPEN: {candle['open']} HIGH: {candle['high']} LOW: {candle['low']} CLOSE: {candle['close']} VOLUME (USD): {volume_usdt} OPEN INTEREST (USD): {open_interest_usd}")
+        candle = scheduler.capture(since, lambda: fetch_previous_candle(since=since), 'BTC-USDT-SWAP 5m', record=False)
+
+        if candle:
+            open_interest_data = scheduler.capture(since, lambda: fetch_open_interest_for_candle(symbol='BTC-USDT-SWAP', candle_timestamp=since), 'BTC-USDT-SWAP 5m')
+
+            if open_interest_data:
+                open_interest_usd = open_interest_data[3]  # Open Interest in USD
+                
+                # Fetch the latest price for accurate volume calculation
+                latest_price = candle['close']  # Or fetch latest price from the exchange for more accuracy
+
+                # Calculate volume in USD using the latest price
+                volume_usdt = candle['volume_coin'] * latest_price
+                
+                # Append the new data to the CSV file
+                record_bar(writer, publisher, candle['timestamp'], candle['open'], candle['high'], candle['low'], candle['close'], volume_usdt, open_interest_usd)
+                print(f"Data written to CSV: Time: {format_timestamp(candle['timestamp'])} - OPEN: {candle['open']} HIGH: {candle['high']} LOW: {candle['low']} CLOSE: {candle['close']} VOLUME (USD): {volume_usdt} OPEN INTEREST (USD): {open_interest_usd}")
+            else:
+                print("No open interest data available for the candle.")
         else:
-            print("No open interest data available for the candle.")
-    else:
-        print("Waiting for Current Candle Closing.")
+            print("Candle was not published before the next bar closed.")
+
+# Write each bar the moment OKX confirms it over WebSocket
+def run_websocket(writer, publisher=None, business_url=BUSINESS_URL, public_url=PUBLIC_URL):
+    # Imported here because live_collector builds on this module; its Series does the
+    # backfill-then-write of each streamed bar for this one series as well
+    from live_collector import Series, run_websocket as run_series
+
+    series = Series('BTC-USDT-SWAP', '5m', publisher=publisher, writer=writer)
+    asyncio.run(run_series([series], business_url, public_url))
+
+def main():
+    parser = argparse.ArgumentParser(description="Record live OKX BTC-USDT-SWAP 5m candles with open interest.")
+    parser.add_argument("--ws", action="store_true", help="Stream confirmed bars over WebSocket instead of polling REST.")
+    parser.add_argument("--ws-url", type=str, default=None, help="Override both WebSocket endpoints, e.g. a local mock_okx_ws.py server.")
+    parser.add_argument("--rotate-daily", action="store_true", help="Write each UTC day to its own Live_Candlestick_Data_YYYY-MM-DD.csv.")
+    parser.add_argument("--fsync-interval", type=int, default=30, help="Seconds between fsyncs of the CSV file (default: 30).")
+    parser.add_argument("--bus-port", type=int, default=BUS_PORT, help="Local port closed bars are published on (default: %(default)s).")
+    parser.add_argument("--no-bus", action="store_true", help="Do not publish bars on the local bar bus.")
+    parser.add_argument("--latency-log", type=str, default=None, help="CSV file to record per-bar fetch latency in.")
+    args = parser.parse_args()
+
+    publisher = None
+    if not args.no_bus:
+        try:
+            publisher = BarPublisher(port=args.bus_port)
+        except OSError as e:
+            print(f"Could not start the bar bus on port {args.bus_port}: {e}. Continuing without it.")
+
+    # Resume after the last stored bar; existing history is kept
+    with LiveCsvWriter(csv_file_path, fsync_interval=args.fsync_interval, rotate_daily=args.rotate_daily) as writer:
+        if writer.last_timestamp is None:
+            write_recent_candles(writer, publisher)
+        else:
+            # Resume: fill everything that closed while the recorder was down
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+            backfill(writer, publisher, now_ms - now_ms % TIMEFRAME_MS['5m'])
+
+        if args.ws:
+            run_websocket(writer, publisher, args.ws_url or BUSINESS_URL, args.ws_url or PUBLIC_URL)
+        else:
+            run_polling(writer, publisher, args.latency_log)
 
-    # Sleep until the start of the next 5-minute interval
-    current_time = datetime.now(timezone.utc)
-    seconds_to_next_5min = (5 - current_time.minute % 5) * 60 - current_time.second - current_time.microsecond / 1_000_000
-    time.sleep(seconds_to_next_5min)
+if __name__ == "__main__":
+    main()
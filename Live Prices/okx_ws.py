@@ -0,0 +1,135 @@
+import asyncio
+import json
+import websockets
+
+# OKX v5 WebSocket endpoints: candles are on the business endpoint, open interest on the public one
+BUSINESS_URL = "wss://ws.okx.com:8443/ws/v5/business"
+PUBLIC_URL = "wss://ws.okx.com:8443/ws/v5/public"
+
+# ccxt-style timeframe -> OKX candle channel
+CANDLE_CHANNELS = {
+    '1m': 'candle1m',
+    '5m': 'candle5m',
+    '15m': 'candle15m',
+    '30m': 'candle30m',
+    '1h': 'candle1H',
+    '4h': 'candle4H',
+    '1d': 'candle1Dutc',
+}
+
+PING_INTERVAL = 25  # OKX drops connections that stay silent for 30 s
+
+
+# Streams confirmed candles joined with the latest open interest, one callback per closed bar.
+# on_bar may be a coroutine function; it then runs as its own task so slow handling (e.g. a
+# REST backfill) never holds up the connections.
+class OkxBarStream:
+    def __init__(self, symbols, timeframe, on_bar, business_url=BUSINESS_URL, public_url=PUBLIC_URL):
+        self.symbols = symbols
+        self.timeframe = timeframe
+        self.channel = CANDLE_CHANNELS[timeframe]
+        self.on_bar = on_bar
+        self.business_url = business_url
+        self.public_url = public_url
+        self.open_interest = {}  # instId -> latest open interest snapshot
+        self.pending = set()  # on_bar tasks still running
+        self.connections = set()  # Open sockets, closed by stop()
+        self.loop = None
+        self.running = True
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            self._connection(self.public_url, "open-interest", self._handle_open_interest),
+            self._connection(self.business_url, self.channel, self._handle_candles),
+        )
+
+    # Safe to call from any thread; closing the sockets ends the message loops right away
+    # instead of at the next message, which on a quiet channel may be minutes off
+    def stop(self):
+        self.running = False
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._close_connections)
+
+    def _close_connections(self):
+        for ws in list(self.connections):
+            asyncio.ensure_future(ws.close())
+
+    # Keep one subscription alive, reconnecting with backoff when it drops
+    async def _connection(self, url, channel, handler):
+        backoff = 1
+        while self.running:
+            try:
+                async with websockets.connect(url, ping_interval=None) as ws:
+                    if not self.running:
+                        break  # Stopped while connecting
+                    args = [{"channel": channel, "instId": symbol} for symbol in self.symbols]
+                    await ws.send(json.dumps({"op": "subscribe", "args": args}))
+                    backoff = 1
+
+                    self.connections.add(ws)
+                    pinger = asyncio.create_task(self._keepalive(ws))
+                    try:
+                        async for message in ws:
+                            if not self.running:
+                                break
+                            if message == "pong":
+                                continue
+                            payload = json.loads(message)
+                            if payload.get("event") == "error":
+                                print(f"WebSocket error on {channel}: {payload.get('msg')}")
+                            elif "data" in payload:
+                                handler(payload["arg"]["instId"], payload["data"])
+                    finally:
+                        pinger.cancel()
+                        self.connections.discard(ws)
+            except (websockets.WebSocketException, OSError) as e:
+                if not self.running:
+                    break
+                print(f"WebSocket {channel} disconnected: {e}. Reconnecting in {backoff} seconds...")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _finished(self, task):
+        self.pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error handling a {self.timeframe} bar: {task.exception()}")
+
+    async def _keepalive(self, ws):
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            await ws.send("ping")
+
+    def _handle_open_interest(self, symbol, data):
+        for snapshot in data:
+            self.open_interest[symbol] = snapshot
+
+    # Candle rows are [ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm]; confirm == "1" once the bar is closed
+    def _handle_candles(self, symbol, data):
+        for candle in data:
+            if candle[8] != "1":
+                continue
+
+            close_price = float(candle[4])
+            volume_coin = float(candle[6])
+            snapshot = self.open_interest.get(symbol)
+            result = self.on_bar(symbol, {
+                'timestamp': int(candle[0]),
+                'open': float(candle[1]),
+                'high': float(candle[2]),
+                'low': float(candle[3]),
+                'close': close_price,
+                'volume_coin': volume_coin,
+                'volume_usd': float(candle[7]) if candle[7] else volume_coin * close_price,
+                'open_interest_usd': snapshot['oiUsd'] if snapshot else None,
+            })
+            if asyncio.iscoroutine(result):
+                task = asyncio.ensure_future(result)
+                self.pending.add(task)
+                task.add_done_callback(self._finished)
+
+
+# Blocking helper for scripts
+def stream_bars(symbols, timeframe, on_bar, business_url=BUSINESS_URL, public_url=PUBLIC_URL):
+    stream = OkxBarStream(symbols, timeframe, on_bar, business_url, public_url)
+    asyncio.run(stream.run())
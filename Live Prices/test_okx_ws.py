@@ -0,0 +1,137 @@
+import csv
+import time
+import asyncio
+
+from mock_okx_ws import MockOkxServer
+from okx_ws import OkxBarStream
+
+SYMBOL = "BTC-USDT-SWAP"
+BAR_MS = 5 * 60 * 1000
+START = 1_700_000_100_000 - 1_700_000_100_000 % BAR_MS
+
+
+# Wait until the stream has subscribed to both the candle and the open interest channel
+async def wait_for_subscriptions(server, channel, symbol=SYMBOL):
+    for _ in range(200):
+        if server.subscribers.get((channel, symbol)) and server.subscribers.get(("open-interest", symbol)):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("stream never subscribed")
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def test_stream_assembles_closed_bars():
+    bars = []
+
+    async def scenario():
+        server = await MockOkxServer(port=0).start()
+        stream = OkxBarStream([SYMBOL], "5m", lambda symbol, bar: bars.append((symbol, bar)), server.url, server.url)
+        task = asyncio.create_task(stream.run())
+        try:
+            await wait_for_subscriptions(server, "candle5m")
+
+            # A bar closing before the first open interest snapshot has no open interest
+            await server.push_candle(SYMBOL, "candle5m", START, 100, 110, 90, 105, 2)
+            await wait_for(lambda: len(bars) == 1)
+
+            await server.push_open_interest(SYMBOL, 1000, 10, 1_050_000)
+            await asyncio.sleep(0.05)  # The snapshot travels on its own connection
+            await server.push_candle(SYMBOL, "candle5m", START + BAR_MS, 105, 120, 100, 115, 3, confirmed=False)
+            await server.push_candle(SYMBOL, "candle5m", START + BAR_MS, 105, 120, 100, 118, 4)
+            await wait_for(lambda: len(bars) == 2)
+        finally:
+            stream.stop()
+            task.cancel()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+    symbol, first = bars[0]
+    assert symbol == SYMBOL
+    assert first['timestamp'] == START
+    assert (first['open'], first['high'], first['low'], first['close']) == (100, 110, 90, 105)
+    assert first['volume_usd'] == 2 * 105
+    assert first['open_interest_usd'] is None
+
+    # The unconfirmed update of the same bar is not reported; the confirmed one is
+    _, second = bars[1]
+    assert second['timestamp'] == START + BAR_MS
+    assert second['close'] == 118
+    assert second['volume_usd'] == 4 * 118
+    assert float(second['open_interest_usd']) == 1_050_000
+
+
+def test_slow_bar_handler_does_not_block_stream():
+    stored = []
+
+    # Stands in for a long REST backfill: blocks its worker thread, not the event loop
+    def store(bar):
+        time.sleep(0.3)
+        stored.append(bar['timestamp'])
+
+    async def on_bar(symbol, bar):
+        async with lock:
+            await asyncio.to_thread(store, bar)
+
+    async def scenario():
+        server = await MockOkxServer(port=0).start()
+        stream = OkxBarStream([SYMBOL], "5m", on_bar, server.url, server.url)
+        task = asyncio.create_task(stream.run())
+        try:
+            await wait_for_subscriptions(server, "candle5m")
+            await server.push_candle(SYMBOL, "candle5m", START, 100, 110, 90, 105, 2)
+            await server.push_candle(SYMBOL, "candle5m", START + BAR_MS, 105, 120, 100, 118, 4)
+
+            # Open interest keeps flowing while the first bar is still being stored
+            await server.push_open_interest(SYMBOL, 1000, 10, 1_050_000)
+            await wait_for(lambda: SYMBOL in stream.open_interest)
+            assert stored == []
+
+            await wait_for(lambda: len(stored) == 2)
+        finally:
+            stream.stop()
+            task.cancel()
+            await server.stop()
+
+    lock = asyncio.Lock()
+    asyncio.run(scenario())
+    assert stored == [START, START + BAR_MS]
+
+
+def test_collector_leaves_missing_open_interest_empty(tmp_path):
+    from live_collector import Series, run_websocket
+
+    series = Series(SYMBOL, "5m", str(tmp_path))
+
+    async def scenario():
+        server = await MockOkxServer(port=0).start()
+        task = asyncio.create_task(run_websocket([series], server.url, server.url))
+        try:
+            await wait_for_subscriptions(server, "candle5m")
+            await server.push_candle(SYMBOL, "candle5m", START, 100, 110, 90, 105, 2)
+            await wait_for(lambda: series.writer.last_timestamp == START)
+
+            await server.push_open_interest(SYMBOL, 1000, 10, 1_050_000)
+            await asyncio.sleep(0.05)
+            await server.push_candle(SYMBOL, "candle5m", START + BAR_MS, 105, 120, 100, 118, 4)
+            await wait_for(lambda: series.writer.last_timestamp == START + BAR_MS)
+        finally:
+            task.cancel()
+            await server.stop()
+            series.writer.close()
+
+    asyncio.run(scenario())
+
+    with open(series.file_path, newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0][-1] == 'Open Interest (USD)'
+    assert len(rows) == 3
+    assert rows[1][-1] == ''
+    assert float(rows[2][-1]) == 1_050_000
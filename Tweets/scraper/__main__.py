@@ -3,6 +3,7 @@ import sys
 import argparse
 import getpass
 from twitter_scraper import Twitter_Scraper
+from session import SESSION_DIR
 
 try:
     from dotenv import load_dotenv
@@ -96,6 +97,19 @@ def main():
             help="Additional data to scrape and save in the .csv file.",
         )
 
+        parser.add_argument(
+            "--seen-file",
+            type=str,
+            default=None,
+            help="File of already scraped tweet IDs. Tweets in it are skipped and new ones are added to it.",
+        )
+
+        parser.add_argument(
+            "--no-session",
+            action="store_true",
+            help="Always log in with username and password instead of reusing the saved session.",
+        )
+
         parser.add_argument(
             "--latest",
             action="store_true",
@@ -146,6 +160,8 @@ def main():
                 mail=USER_MAIL,
                 username=USER_UNAME,
                 password=USER_PASSWORD,
+                seen_tweets_file=args.seen_file,
+                session_dir=None if args.no_session else SESSION_DIR,
             )
             scraper.login()
             scraper.scrape_tweets(
@@ -0,0 +1,265 @@
+import sys
+import queue
+import argparse
+import threading
+from datetime import date, timedelta
+from seen_tweets import SeenTweets
+from twitter_scraper import Twitter_Scraper, save_tweets
+
+
+# Accounts from a credentials file in the record.txt / .env layout: a TWITTER_USERNAME line
+# starts an account, the TWITTER_PASSWORD (and optional TWITTER_MAIL) lines after it complete it
+def load_accounts(path):
+    accounts = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = (part.strip() for part in line.split("=", 1))
+            key = key.upper()
+            if key == "TWITTER_USERNAME":
+                accounts.append({"username": value, "password": None, "mail": None})
+            elif key == "TWITTER_PASSWORD" and accounts:
+                accounts[-1]["password"] = value
+            elif key == "TWITTER_MAIL" and accounts:
+                accounts[-1]["mail"] = value
+    return [account for account in accounts if account["password"]]
+
+
+# Split [since, until) into up to `slices` contiguous day ranges, in Twitter's since:/until: form
+def time_slices(since, until, slices):
+    if since is None and until is None:
+        return [(None, None)]
+    start = date.fromisoformat(since) if since else date(2006, 3, 21)
+    end = date.fromisoformat(until) if until else date.today() + timedelta(days=1)
+    days = (end - start).days
+    if days <= 0:
+        print("--since must be before --until.")
+        sys.exit(1)
+
+    slices = max(1, min(slices, days))
+    bounds = [start + timedelta(days=days * i // slices) for i in range(slices + 1)]
+    return [(bounds[i].isoformat(), bounds[i + 1].isoformat()) for i in range(slices)]
+
+
+# One task per query or hashtag and time range; hashtags with a time range become searches
+def build_tasks(queries, hashtags, ranges):
+    tasks = []
+    terms = [("query", query) for query in queries] + [
+        ("hashtag", hashtag.lstrip("#")) for hashtag in hashtags
+    ]
+    for kind, term in terms:
+        for since, until in ranges:
+            if since is None:
+                tasks.append({kind: term})
+            else:
+                search = f"#{term}" if kind == "hashtag" else term
+                tasks.append({"query": f"{search} since:{since} until:{until}"})
+    return tasks
+
+
+def describe(task):
+    return f"#{task['hashtag']}" if "hashtag" in task else task["query"]
+
+
+# Scraping pool: one headless browser per account, each logged in once, pulling tasks from a
+# shared queue until it is empty. Browsers are separate processes and the Python side mostly
+# waits on them, so threads are enough and throughput grows with the number of workers.
+class ScraperPool:
+    def __init__(self, accounts, workers=None, seen_tweets_file=None) -> None:
+        self.accounts = accounts[:workers] if workers else accounts
+        self.seen = SeenTweets(seen_tweets_file)  # Shared: a tweet found by one worker is skipped by the rest
+        self.tasks = queue.Queue()
+        self.results = []
+        self.scrapers = []
+        self.lock = threading.Lock()
+        pass
+
+    def run(self, tasks, **scrape_options) -> list:
+        for task in tasks:
+            self.tasks.put(task)
+
+        print(f"Scraping {len(tasks)} tasks with {len(self.accounts)} workers...")
+        threads = [
+            threading.Thread(
+                target=self._worker, args=(account, scrape_options), daemon=True
+            )
+            for account in self.accounts
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1)  # Short joins keep Ctrl+C responsive
+        except KeyboardInterrupt:
+            print("\nKeyboard Interrupt: stopping workers and keeping the tweets scraped so far")
+            self.close()
+
+        if not self.tasks.empty():
+            print(f"{self.tasks.qsize()} tasks were not scraped; every worker stopped early.")
+
+        self.seen.save()
+        return self.merged()
+
+    def _worker(self, account, scrape_options) -> None:
+        name = account["username"]
+        try:
+            scraper = Twitter_Scraper(
+                mail=account["mail"],
+                username=account["username"],
+                password=account["password"],
+                seen_tweets=self.seen,
+            )
+        except (SystemExit, Exception) as e:
+            print(f"[{name}] Could not start a browser: {e}")
+            return
+        with self.lock:
+            self.scrapers.append(scraper)
+
+        try:
+            scraper.login()
+            while True:
+                try:
+                    task = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                scraper.scrape_tweets(
+                    scrape_query=task.get("query"),
+                    scrape_hashtag=task.get("hashtag"),
+                    **scrape_options,
+                )
+                tweets = scraper.get_tweets()
+                with self.lock:
+                    self.results.extend(tweets)
+                print(f"[{name}] {describe(task)}: {len(tweets)} tweets")
+        except (SystemExit, Exception) as e:
+            print(f"[{name}] Worker stopped: {e}")
+        finally:
+            scraper.driver.quit()
+
+    # All workers' tweets in one list, each status ID once
+    def merged(self) -> list:
+        tweets = {}
+        with self.lock:
+            for tweet in self.results:
+                tweets.setdefault(tweet[14], tweet)
+        return list(tweets.values())
+
+    def close(self) -> None:
+        with self.lock:
+            for scraper in self.scrapers:
+                try:
+                    scraper.driver.quit()
+                except Exception:
+                    pass
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        add_help=True,
+        usage="python scraper/pool.py [option] ... [arg] ...",
+        description="Scrape several queries or hashtags in parallel, one browser and account per worker, into one deduplicated CSV.",
+    )
+    parser.add_argument(
+        "--accounts",
+        type=str,
+        required=True,
+        help="Credentials file with TWITTER_USERNAME / TWITTER_PASSWORD lines, one pair per account.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of parallel browsers (default: one per account).",
+    )
+    parser.add_argument(
+        "-q",
+        "--query",
+        action="append",
+        default=[],
+        help="Search query to scrape. Repeat for several queries.",
+    )
+    parser.add_argument(
+        "-ht",
+        "--hashtag",
+        action="append",
+        default=[],
+        help="Hashtag to scrape. Repeat for several hashtags.",
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        default=None,
+        help="Start date (YYYY-MM-DD) of the time range to split across workers.",
+    )
+    parser.add_argument(
+        "--until",
+        type=str,
+        default=None,
+        help="End date (YYYY-MM-DD, exclusive) of the time range to split across workers.",
+    )
+    parser.add_argument(
+        "--slices",
+        type=int,
+        default=None,
+        help="Number of time ranges per query or hashtag (default: the number of workers).",
+    )
+    parser.add_argument(
+        "-t",
+        "--tweets",
+        type=int,
+        default=50,
+        help="Number of tweets to scrape per task (default: 50)",
+    )
+    parser.add_argument(
+        "-ntl",
+        "--no_tweets_limit",
+        action="store_true",
+        help="Scrape each task until no more tweets are available.",
+    )
+    parser.add_argument(
+        "--seen-file",
+        type=str,
+        default=None,
+        help="File of already scraped tweet IDs. Tweets in it are skipped and new ones are added to it.",
+    )
+    parser.add_argument("--latest", action="store_true", help="Scrape latest tweets")
+    parser.add_argument("--top", action="store_true", help="Scrape top tweets")
+    args = parser.parse_args()
+
+    if not args.query and not args.hashtag:
+        print("Please specify at least one --query or --hashtag.")
+        sys.exit(1)
+
+    if args.latest and args.top:
+        print("Please specify either --latest or --top. Not both.")
+        sys.exit(1)
+
+    accounts = load_accounts(args.accounts)
+    if not accounts:
+        print(f"No accounts found in {args.accounts}.")
+        sys.exit(1)
+
+    pool = ScraperPool(accounts, args.workers, args.seen_file)
+    ranges = time_slices(args.since, args.until, args.slices or len(pool.accounts))
+    tasks = build_tasks(args.query, args.hashtag, ranges)
+
+    tweets = pool.run(
+        tasks,
+        max_tweets=args.tweets,
+        no_tweets_limit=args.no_tweets_limit,
+        scrape_latest=args.latest,
+        scrape_top=args.top,
+    )
+    print(f"Merged {len(tweets)} unique tweets from {len(tasks)} tasks")
+    if tweets:
+        save_tweets(tweets, label="pool_tweets")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,60 @@
+MIN_STEP = 0.5  # Scroll step bounds, in viewport heights. The timeline unmounts cards a
+MAX_STEP = 1.5  # couple of screens behind the viewport, so longer jumps would skip tweets
+MIN_WAIT = 0.3  # Bounds, in seconds, on how long one scroll waits for new cards
+MAX_WAIT = 4.0
+
+# Installs (once per page) a MutationObserver counting tweet cards added anywhere under
+# <body>, then scrolls by `step` viewports and resolves as soon as the observer sees new
+# cards, or after `waitMs` if none arrive. The wait happens in the browser, so Python
+# makes one call per scroll and never sleeps.
+SCROLL_AND_WAIT_SCRIPT = """
+const [step, waitMs, done] = arguments;
+if (!window.__scrollerState) {
+    const state = { added: 0, notify: null };
+    const isCard = (node) =>
+        node.nodeType === Node.ELEMENT_NODE &&
+        (node.matches('article[data-testid="tweet"]') ||
+            node.querySelector('article[data-testid="tweet"]') !== null);
+    new MutationObserver((mutations) => {
+        let added = 0;
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (isCard(node)) added += 1;
+            }
+        }
+        if (added > 0) {
+            state.added += added;
+            if (state.notify) state.notify();
+        }
+    }).observe(document.body, { childList: true, subtree: true });
+    window.__scrollerState = state;
+}
+
+const state = window.__scrollerState;
+const before = state.added;
+const start = performance.now();
+let timer = null;
+const finish = () => {
+    state.notify = null;
+    clearTimeout(timer);
+    done({
+        added: state.added - before,
+        waited: (performance.now() - start) / 1000,
+        at_bottom: window.innerHeight + window.pageYOffset >= document.body.scrollHeight - 2,
+        position: window.pageYOffset,
+        cards: document.querySelectorAll('article[data-testid="tweet"]').length,
+    });
+};
+if (step <= 0 && document.querySelector('article[data-testid="tweet"]') !== null) {
+    finish();
+    return;
+}
+timer = setTimeout(finish, waitMs);
+state.notify = finish;
+if (step > 0) window.scrollBy(0, step * window.innerHeight);
+"""
+
+
 class Scroller:
     def __init__(self, driver) -> None:
         self.driver = driver
@@ -5,12 +62,18 @@ class Scroller:
         self.last_position = driver.execute_script("return window.pageYOffset;")
         self.scrolling = True
         self.scroll_count = 0
+        self.step = 1.0
+        self.wait = 1.0
+        self.load_time = None  # Moving average of how long new cards take to appear
         pass
 
     def reset(self) -> None:
         self.current_position = 0
         self.last_position = self.driver.execute_script("return window.pageYOffset;")
         self.scroll_count = 0
+        self.step = 1.0
+        self.wait = 1.0
+        self.load_time = None
         pass
 
     def scroll_to_top(self) -> None:
@@ -24,3 +87,36 @@ class Scroller:
     def update_scroll_position(self) -> None:
         self.current_position = self.driver.execute_script("return window.pageYOffset;")
         pass
+
+    def _run(self, step, wait) -> dict:
+        self.driver.set_script_timeout(wait + 5)
+        return self.driver.execute_async_script(
+            SCROLL_AND_WAIT_SCRIPT, step, int(wait * 1000)
+        )
+
+    # Wait, without scrolling, until the first cards of a freshly loaded page render
+    def wait_for_cards(self, timeout=10) -> bool:
+        return self._run(0, timeout)["cards"] > 0
+
+    # Scroll one step and wait until new cards appear; returns how many did. The step grows
+    # while cards keep arriving quickly and shrinks when a scroll brings nothing, and the
+    # wait follows the observed load time.
+    def scroll_and_wait(self) -> int:
+        result = self._run(self.step, self.wait)
+        self.last_position = self.current_position
+        self.current_position = result["position"]
+        self.scroll_count += 1
+
+        if result["added"] > 0:
+            waited = result["waited"]
+            self.load_time = (
+                waited if self.load_time is None else 0.7 * self.load_time + 0.3 * waited
+            )
+            self.wait = min(max(3 * self.load_time, MIN_WAIT), MAX_WAIT)
+            if waited < self.wait / 2:
+                self.step = min(self.step * 1.5, MAX_STEP)
+        else:
+            self.step = max(self.step / 2, MIN_STEP)
+            self.wait = min(self.wait * 1.5, MAX_WAIT)
+
+        return result["added"]
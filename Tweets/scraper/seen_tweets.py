@@ -0,0 +1,49 @@
+import os
+import threading
+from array import array
+
+
+# Numeric status IDs of tweets already scraped: a set of ints in memory and, if a path is
+# given, an append-only file of 8-byte integers, so a later run skips what an earlier one saved.
+# Safe to share between the scrapers of a pool.
+class SeenTweets:
+    def __init__(self, path=None) -> None:
+        self.path = path
+        self.ids = set()
+        self.unsaved = array("q")
+        self.lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            stored = array("q")
+            with open(path, "rb") as file:
+                stored.frombytes(file.read())
+            self.ids.update(stored)
+        pass
+
+    def __contains__(self, tweet_id) -> bool:
+        return int(tweet_id) in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # Returns False if the tweet was already seen
+    def add(self, tweet_id) -> bool:
+        tweet_id = int(tweet_id)
+        with self.lock:
+            if tweet_id in self.ids:
+                return False
+            self.ids.add(tweet_id)
+            self.unsaved.append(tweet_id)
+        return True
+
+    def save(self) -> None:
+        with self.lock:
+            if self.path is None or not self.unsaved:
+                return
+            folder = os.path.dirname(self.path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            with open(self.path, "ab") as file:
+                file.write(self.unsaved.tobytes())
+            self.unsaved = array("q")
+        pass
@@ -0,0 +1,66 @@
+import os
+import re
+import json
+
+SESSION_DIR = "./sessions/"
+
+
+def session_path(session_dir, username):
+    return os.path.join(session_dir, re.sub(r"[^\w.-]", "_", username.lstrip("@")) + ".json")
+
+
+# Cookies and localStorage of the logged-in page. The file holds the account's auth token,
+# so it is readable by its owner only.
+def save_session(driver, path) -> None:
+    session = {
+        "origin": driver.execute_script("return window.location.origin;"),
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script(
+            "return Object.assign({}, window.localStorage);"
+        ),
+    }
+
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+        json.dump(session, file)
+    pass
+
+
+# Put a saved session back into the browser; returns False if there is none to restore.
+# Cookies and localStorage can only be set on their own origin, so a light page there is
+# opened first.
+def restore_session(driver, path) -> bool:
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, encoding="utf-8") as file:
+            session = json.load(file)
+        origin = session["origin"]
+        cookies = session["cookies"]
+    except (OSError, ValueError, KeyError):
+        return False
+
+    driver.get(origin + "/robots.txt")
+    for cookie in cookies:
+        if "expiry" in cookie:
+            cookie["expiry"] = int(cookie["expiry"])
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            continue  # A cookie for another domain or an expired one; the rest still apply
+
+    driver.execute_script(
+        "for (const [key, value] of Object.entries(arguments[0])) { window.localStorage.setItem(key, value); }",
+        session.get("local_storage") or {},
+    )
+    return True
+
+
+def clear_session(driver, path) -> None:
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear();")
+    if os.path.exists(path):
+        os.remove(path)
+    pass
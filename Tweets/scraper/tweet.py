@@ -6,252 +6,135 @@ from selenium.common.exceptions import (
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.action_chains import ActionChains
 
+# Parses every visible tweet card in the page in one round-trip to the driver. Returns one
+# object per card; "card" is the article element itself, which Selenium hands back as a
+# WebElement for the poster-details hover. Cards whose tweet this page has already kept (see
+# mark_scraped) are skipped before parsing, however often the timeline re-renders them.
+EXTRACT_TWEETS_SCRIPT = """
+const text = (el) => (el ? el.innerText : null);
+const count = (card, selector) => text(card.querySelector(selector)) || "0";
+const seen = window.__scrapedTweetIds || new Set();
+
+const cards = [];
+for (const card of document.querySelectorAll('article[data-testid="tweet"]:not([disabled])')) {
+    // The tweet's own permalink wraps its timestamp; quoted tweets come after it
+    const time = card.querySelector("time");
+    const link =
+        (time && time.closest('a[href*="/status/"]')) ||
+        card.querySelector('a[href*="/status/"]');
+    const match = link ? link.href.match(/\/status\/(\d+)/) : null;
+    const tweetId = match ? match[1] : null;
+    if (tweetId !== null && seen.has(tweetId)) continue;
+    cards.push({ card, time, link, tweetId });
+}
+
+return cards.map(({ card, time, link, tweetId }) => {
+    const tweetText = card.querySelector('div[data-testid="tweetText"]');
+    const parts = tweetText ? Array.from(tweetText.children) : [];
+    const handle = Array.from(card.querySelectorAll("span")).find((span) =>
+        Array.from(span.childNodes).some(
+            (node) => node.nodeType === Node.TEXT_NODE && node.textContent.includes("@")
+        )
+    );
+    const avatar = card.querySelector('div[data-testid="Tweet-User-Avatar"] img');
+
+    return {
+        card: card,
+        user: text(card.querySelector('div[data-testid="User-Name"] span')),
+        handle: text(handle),
+        date_time: time ? time.getAttribute("datetime") : null,
+        verified: card.querySelector('svg[data-testid="icon-verified"]') !== null,
+        content: parts
+            .filter((el) => el.tagName === "SPAN" || el.tagName === "A")
+            .map((el) => el.innerText)
+            .join(""),
+        reply_cnt: count(card, 'button[data-testid="reply"] span'),
+        retweet_cnt: count(card, 'button[data-testid="retweet"] span'),
+        like_cnt: count(card, 'button[data-testid="like"] span'),
+        analytics_cnt: count(card, 'a[href*="/analytics"] span'),
+        tags: Array.from(card.querySelectorAll('a[href*="src=hashtag_click"]')).map(text),
+        mentions: tweetText
+            ? Array.from(tweetText.querySelectorAll("a"))
+                  .filter((a) => a.textContent.includes("@"))
+                  .map(text)
+            : [],
+        emojis: parts
+            .filter((el) => el.tagName === "IMG" && el.src.includes("emoji"))
+            .map((img) => img.alt),
+        profile_img: avatar ? avatar.src : "",
+        tweet_link: link ? link.href : "",
+        tweet_id: tweetId,
+    };
+});
+"""
+
+
+# Records status IDs on the page once their tweets have been kept. A card that was skipped,
+# e.g. half-rendered or failing the poster-details hover, is parsed again on the next pass.
+MARK_SCRAPED_SCRIPT = """
+const seen = window.__scrapedTweetIds || (window.__scrapedTweetIds = new Set());
+for (const tweetId of arguments[0]) seen.add(tweetId);
+"""
+
+
+def extract_tweets(driver: WebDriver) -> list:
+    return driver.execute_script(EXTRACT_TWEETS_SCRIPT) or []
+
+
+def mark_scraped(driver: WebDriver, tweet_ids) -> None:
+    if tweet_ids:
+        driver.execute_script(MARK_SCRAPED_SCRIPT, list(tweet_ids))
+    pass
+
 
 class Tweet:
     def __init__(
         self,
-        card: WebDriver,
-        driver: WebDriver,
-        actions: ActionChains,
+        data: dict,
+        driver: WebDriver = None,
+        actions: ActionChains = None,
         scrape_poster_details=False,
     ) -> None:
-        self.card = card
+        self.card = data.get("card")
         self.error = False
         self.tweet = None
 
-        try:
-            self.user = card.find_element(
-                "xpath", './/div[@data-testid="User-Name"]//span'
-            ).text
-        except NoSuchElementException:
-            self.error = True
-            self.user = "skip"
+        self.user = data.get("user")
+        self.handle = data.get("handle")
+        self.date_time = data.get("date_time")
+        self.is_ad = self.date_time is None
 
-        try:
-            self.handle = card.find_element(
-                "xpath", './/span[contains(text(), "@")]'
-            ).text
-        except NoSuchElementException:
+        if self.user is None or self.handle is None or self.is_ad:
             self.error = True
-            self.handle = "skip"
-
-        try:
-            self.date_time = card.find_element("xpath", ".//time").get_attribute(
-                "datetime"
-            )
-
-            if self.date_time is not None:
-                self.is_ad = False
-        except NoSuchElementException:
-            self.is_ad = True
-            self.error = True
-            self.date_time = "skip"
-
-        if self.error:
+            self.user = self.user or "skip"
+            self.handle = self.handle or "skip"
+            self.date_time = self.date_time or "skip"
             return
 
-        try:
-            card.find_element(
-                "xpath", './/*[local-name()="svg" and @data-testid="icon-verified"]'
-            )
-
-            self.verified = True
-        except NoSuchElementException:
-            self.verified = False
-
-        self.content = ""
-        contents = card.find_elements(
-            "xpath",
-            '(.//div[@data-testid="tweetText"])[1]/span | (.//div[@data-testid="tweetText"])[1]/a',
-        )
-
-        for index, content in enumerate(contents):
-            self.content += content.text
-
-        try:
-            self.reply_cnt = card.find_element(
-                "xpath", './/button[@data-testid="reply"]//span'
-            ).text
-
-            if self.reply_cnt == "":
-                self.reply_cnt = "0"
-        except NoSuchElementException:
-            self.reply_cnt = "0"
-
-        try:
-            self.retweet_cnt = card.find_element(
-                "xpath", './/button[@data-testid="retweet"]//span'
-            ).text
-
-            if self.retweet_cnt == "":
-                self.retweet_cnt = "0"
-        except NoSuchElementException:
-            self.retweet_cnt = "0"
-
-        try:
-            self.like_cnt = card.find_element(
-                "xpath", './/button[@data-testid="like"]//span'
-            ).text
-
-            if self.like_cnt == "":
-                self.like_cnt = "0"
-        except NoSuchElementException:
-            self.like_cnt = "0"
-
-        try:
-            self.analytics_cnt = card.find_element(
-                "xpath", './/a[contains(@href, "/analytics")]//span'
-            ).text
-
-            if self.analytics_cnt == "":
-                self.analytics_cnt = "0"
-        except NoSuchElementException:
-            self.analytics_cnt = "0"
-
-        try:
-            self.tags = card.find_elements(
-                "xpath",
-                './/a[contains(@href, "src=hashtag_click")]',
-            )
-
-            self.tags = [tag.text for tag in self.tags]
-        except NoSuchElementException:
-            self.tags = []
-
-        try:
-            self.mentions = card.find_elements(
-                "xpath",
-                '(.//div[@data-testid="tweetText"])[1]//a[contains(text(), "@")]',
-            )
-
-            self.mentions = [mention.text for mention in self.mentions]
-        except NoSuchElementException:
-            self.mentions = []
-
-        try:
-            raw_emojis = card.find_elements(
-                "xpath",
-                '(.//div[@data-testid="tweetText"])[1]/img[contains(@src, "emoji")]',
-            )
-
-            self.emojis = [
-                emoji.get_attribute("alt").encode("unicode-escape").decode("ASCII")
-                for emoji in raw_emojis
-            ]
-        except NoSuchElementException:
-            self.emojis = []
-
-        try:
-            self.profile_img = card.find_element(
-                "xpath", './/div[@data-testid="Tweet-User-Avatar"]//img'
-            ).get_attribute("src")
-        except NoSuchElementException:
-            self.profile_img = ""
-
-        try:
-            self.tweet_link = self.card.find_element(
-                "xpath",
-                ".//a[contains(@href, '/status/')]",
-            ).get_attribute("href")
-            self.tweet_id = str(self.tweet_link.split("/")[-1])
-        except NoSuchElementException:
-            self.tweet_link = ""
-            self.tweet_id = ""
+        self.verified = data.get("verified", False)
+        self.content = data.get("content", "")
+        self.reply_cnt = data.get("reply_cnt") or "0"
+        self.retweet_cnt = data.get("retweet_cnt") or "0"
+        self.like_cnt = data.get("like_cnt") or "0"
+        self.analytics_cnt = data.get("analytics_cnt") or "0"
+        self.tags = data.get("tags", [])
+        self.mentions = data.get("mentions", [])
+        self.emojis = [
+            emoji.encode("unicode-escape").decode("ASCII")
+            for emoji in data.get("emojis", [])
+        ]
+        self.profile_img = data.get("profile_img", "")
+        self.tweet_link = data.get("tweet_link", "")
+        self.tweet_id = data.get("tweet_id") or ""
 
         self.following_cnt = "0"
         self.followers_cnt = "0"
         self.user_id = None
 
         if scrape_poster_details:
-            el_name = card.find_element(
-                "xpath", './/div[@data-testid="User-Name"]//span'
-            )
-
-            ext_hover_card = False
-            ext_user_id = False
-            ext_following = False
-            ext_followers = False
-            hover_attempt = 0
-
-            while (
-                not ext_hover_card
-                or not ext_user_id
-                or not ext_following
-                or not ext_followers
-            ):
-                try:
-                    actions.move_to_element(el_name).perform()
-
-                    hover_card = driver.find_element(
-                        "xpath", '//div[@data-testid="hoverCardParent"]'
-                    )
-
-                    ext_hover_card = True
-
-                    while not ext_user_id:
-                        try:
-                            raw_user_id = hover_card.find_element(
-                                "xpath",
-                                '(.//div[contains(@data-testid, "-follow")]) | (.//div[contains(@data-testid, "-unfollow")])',
-                            ).get_attribute("data-testid")
-
-                            if raw_user_id == "":
-                                self.user_id = None
-                            else:
-                                self.user_id = str(raw_user_id.split("-")[0])
-
-                            ext_user_id = True
-                        except NoSuchElementException:
-                            continue
-                        except StaleElementReferenceException:
-                            self.error = True
-                            return
-
-                    while not ext_following:
-                        try:
-                            self.following_cnt = hover_card.find_element(
-                                "xpath", './/a[contains(@href, "/following")]//span'
-                            ).text
-
-                            if self.following_cnt == "":
-                                self.following_cnt = "0"
-
-                            ext_following = True
-                        except NoSuchElementException:
-                            continue
-                        except StaleElementReferenceException:
-                            self.error = True
-                            return
-
-                    while not ext_followers:
-                        try:
-                            self.followers_cnt = hover_card.find_element(
-                                "xpath",
-                                './/a[contains(@href, "/verified_followers")]//span',
-                            ).text
-
-                            if self.followers_cnt == "":
-                                self.followers_cnt = "0"
-
-                            ext_followers = True
-                        except NoSuchElementException:
-                            continue
-                        except StaleElementReferenceException:
-                            self.error = True
-                            return
-                except NoSuchElementException:
-                    if hover_attempt == 3:
-                        self.error
-                        return
-                    hover_attempt += 1
-                    sleep(0.5)
-                    continue
-                except StaleElementReferenceException:
-                    self.error = True
-                    return
-
-            if ext_hover_card and ext_following and ext_followers:
-                actions.reset_actions()
+            if not self._scrape_poster_details(driver, actions):
+                self.error = True
+                return
 
         self.tweet = (
             self.user,
@@ -275,3 +158,92 @@ class Tweet:
         )
 
         pass
+
+    # Poster details only exist in the hover card, so this still drives the browser per tweet
+    def _scrape_poster_details(self, driver: WebDriver, actions: ActionChains) -> bool:
+        el_name = self.card.find_element(
+            "xpath", './/div[@data-testid="User-Name"]//span'
+        )
+
+        ext_hover_card = False
+        ext_user_id = False
+        ext_following = False
+        ext_followers = False
+        hover_attempt = 0
+
+        while (
+            not ext_hover_card
+            or not ext_user_id
+            or not ext_following
+            or not ext_followers
+        ):
+            try:
+                actions.move_to_element(el_name).perform()
+
+                hover_card = driver.find_element(
+                    "xpath", '//div[@data-testid="hoverCardParent"]'
+                )
+
+                ext_hover_card = True
+
+                while not ext_user_id:
+                    try:
+                        raw_user_id = hover_card.find_element(
+                            "xpath",
+                            '(.//div[contains(@data-testid, "-follow")]) | (.//div[contains(@data-testid, "-unfollow")])',
+                        ).get_attribute("data-testid")
+
+                        if raw_user_id == "":
+                            self.user_id = None
+                        else:
+                            self.user_id = str(raw_user_id.split("-")[0])
+
+                        ext_user_id = True
+                    except NoSuchElementException:
+                        continue
+                    except StaleElementReferenceException:
+                        return False
+
+                while not ext_following:
+                    try:
+                        self.following_cnt = hover_card.find_element(
+                            "xpath", './/a[contains(@href, "/following")]//span'
+                        ).text
+
+                        if self.following_cnt == "":
+                            self.following_cnt = "0"
+
+                        ext_following = True
+                    except NoSuchElementException:
+                        continue
+                    except StaleElementReferenceException:
+                        return False
+
+                while not ext_followers:
+                    try:
+                        self.followers_cnt = hover_card.find_element(
+                            "xpath",
+                            './/a[contains(@href, "/verified_followers")]//span',
+                        ).text
+
+                        if self.followers_cnt == "":
+                            self.followers_cnt = "0"
+
+                        ext_followers = True
+                    except NoSuchElementException:
+                        continue
+                    except StaleElementReferenceException:
+                        return False
+            except NoSuchElementException:
+                if hover_attempt == 3:
+                    return False
+                hover_attempt += 1
+                sleep(0.5)
+                continue
+            except StaleElementReferenceException:
+                return False
+
+        if ext_hover_card and ext_following and ext_followers:
+            actions.reset_actions()
+
+        return True
@@ -1,9 +1,12 @@
 import os
 import sys
 import pandas as pd
+from urllib.parse import quote
 from progress import Progress
 from scroller import Scroller
-from tweet import Tweet
+from tweet import Tweet, extract_tweets, mark_scraped
+from seen_tweets import SeenTweets
+from session import SESSION_DIR, clear_session, restore_session, save_session, session_path
 
 from datetime import datetime
 from fake_headers import Headers
@@ -31,6 +34,49 @@ from webdriver_manager.firefox import GeckoDriverManager
 TWITTER_LOGIN_URL = "https://twitter.com/i/flow/login"
 
 
+def save_tweets(tweets, poster_details=False, label="tweets"):
+    print("Saving Tweets to CSV...")
+    now = datetime.now()
+    folder_path = "./tweets/"
+
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+        print("Created Folder: {}".format(folder_path))
+
+    data = {
+        "Name": [tweet[0] for tweet in tweets],
+        "Handle": [tweet[1] for tweet in tweets],
+        "Timestamp": [tweet[2] for tweet in tweets],
+        "Verified": [tweet[3] for tweet in tweets],
+        "Content": [tweet[4] for tweet in tweets],
+        "Comments": [tweet[5] for tweet in tweets],
+        "Retweets": [tweet[6] for tweet in tweets],
+        "Likes": [tweet[7] for tweet in tweets],
+        "Analytics": [tweet[8] for tweet in tweets],
+        "Tags": [tweet[9] for tweet in tweets],
+        "Mentions": [tweet[10] for tweet in tweets],
+        "Emojis": [tweet[11] for tweet in tweets],
+        "Profile Image": [tweet[12] for tweet in tweets],
+        "Tweet Link": [tweet[13] for tweet in tweets],
+        "Tweet ID": [f"tweet_id:{tweet[14]}" for tweet in tweets],
+    }
+
+    if poster_details:
+        data["Tweeter ID"] = [f"user_id:{tweet[15]}" for tweet in tweets]
+        data["Following"] = [tweet[16] for tweet in tweets]
+        data["Followers"] = [tweet[17] for tweet in tweets]
+
+    df = pd.DataFrame(data)
+
+    current_time = now.strftime("%Y-%m-%d_%H-%M-%S")
+    file_path = f"{folder_path}{current_time}_{label}_1-{len(tweets)}.csv"
+    pd.set_option("display.max_colwidth", None)
+    df.to_csv(file_path, index=False, encoding="utf-8")
+
+    print("CSV Saved: {}".format(file_path))
+    return file_path
+
+
 class Twitter_Scraper:
     def __init__(
         self,
@@ -45,13 +91,19 @@ class Twitter_Scraper:
         scrape_latest=True,
         scrape_top=False,
         proxy=None,
+        seen_tweets_file=None,
+        seen_tweets=None,
+        session_dir=SESSION_DIR,
     ):
         print("Initializing Twitter Scraper...")
         self.mail = mail
         self.username = username
         self.password = password
+        self.session_dir = session_dir  # None always runs the full login flow
         self.interrupted = False
-        self.tweet_ids = set()
+        self.seen_tweets_file = seen_tweets_file
+        self.seen_tweets = seen_tweets  # Shared between the scrapers of a pool
+        self.tweet_ids = seen_tweets if seen_tweets is not None else SeenTweets(seen_tweets_file)
         self.data = []
         self.tweet_cards = []
         self.scraper_details = {
@@ -88,7 +140,11 @@ class Twitter_Scraper:
         scrape_top=False,
         scrape_poster_details=False,
     ):
-        self.tweet_ids = set()
+        self.tweet_ids = (
+            self.seen_tweets
+            if self.seen_tweets is not None
+            else SeenTweets(self.seen_tweets_file)
+        )
         self.data = []
         self.tweet_cards = []
         self.max_tweets = max_tweets
@@ -191,6 +247,13 @@ class Twitter_Scraper:
 
         try:
             self.driver.maximize_window()
+
+            if self._resume_session():
+                print()
+                print("Login Successful (saved session)")
+                print()
+                return
+
             self.driver.get(TWITTER_LOGIN_URL)
             sleep(3)
 
@@ -220,6 +283,8 @@ class Twitter_Scraper:
             print()
             print("Login Successful")
             print()
+
+            self._save_session()
         except Exception as e:
             print()
             print(f"Login Failed: {e}")
@@ -227,6 +292,37 @@ class Twitter_Scraper:
 
         pass
 
+    # Reuse the cookies and localStorage of an earlier login. A session that no longer reaches
+    # the home timeline is deleted and the full login flow runs instead.
+    def _resume_session(self):
+        if self.session_dir is None:
+            return False
+
+        path = session_path(self.session_dir, self.username)
+        try:
+            if not restore_session(self.driver, path):
+                return False
+
+            self.driver.get("https://twitter.com/home")
+            if "/home" in self.driver.current_url and self.scroller.wait_for_cards():
+                return True
+
+            print("Saved session is no longer valid, logging in again...")
+            clear_session(self.driver, path)
+        except Exception as e:
+            print(f"Could not restore the saved session: {e}")
+        return False
+
+    def _save_session(self):
+        if self.session_dir is None:
+            return
+
+        try:
+            save_session(self.driver, session_path(self.session_dir, self.username))
+        except Exception as e:
+            print(f"Could not save the session: {e}")
+        pass
+
     def _input_username(self):
         input_attempt = 0
 
@@ -308,7 +404,7 @@ It may be due to the following:
 
     def go_to_home(self):
         self.driver.get("https://twitter.com/home")
-        sleep(3)
+        self.scroller.wait_for_cards()
         pass
 
     def go_to_profile(self):
@@ -320,7 +416,7 @@ It may be due to the following:
             sys.exit(1)
         else:
             self.driver.get(f"https://twitter.com/{self.scraper_details['username']}")
-            sleep(3)
+            self.scroller.wait_for_cards()
         pass
 
     def go_to_hashtag(self):
@@ -336,7 +432,7 @@ It may be due to the following:
                 url += "&f=live"
 
             self.driver.get(url)
-            sleep(3)
+            self.scroller.wait_for_cards()
         pass
 
     def go_to_search(self):
@@ -344,18 +440,17 @@ It may be due to the following:
             print("Query is not set.")
             sys.exit(1)
         else:
-            url = f"https://twitter.com/search?q={self.scraper_details['query']}&src=typed_query"
+            url = f"https://twitter.com/search?q={quote(self.scraper_details['query'])}&src=typed_query"
             if self.scraper_details["tab"] == "Latest":
                 url += "&f=live"
 
             self.driver.get(url)
-            sleep(3)
+            self.scroller.wait_for_cards()
         pass
 
+    # Parsed fields of every visible card, fetched with a single execute_script
     def get_tweet_cards(self):
-        self.tweet_cards = self.driver.find_elements(
-            "xpath", '//article[@data-testid="tweet" and not(@disabled)]'
-        )
+        self.tweet_cards = extract_tweets(self.driver)
         pass
 
     def remove_hidden_cards(self):
@@ -437,21 +532,16 @@ It may be due to the following:
             try:
                 self.get_tweet_cards()
                 added_tweets = 0
+                kept_ids = []
 
-                for card in self.tweet_cards[-15:]:
+                # Each card comes back once per page; the status ID also skips tweets saved by earlier runs
+                for card_data in self.tweet_cards:
                     try:
-                        tweet_id = str(card)
-
-                        if tweet_id not in self.tweet_ids:
-                            self.tweet_ids.add(tweet_id)
-
-                            if not self.scraper_details["poster_details"]:
-                                self.driver.execute_script(
-                                    "arguments[0].scrollIntoView();", card
-                                )
+                        tweet_id = card_data["tweet_id"]
 
+                        if tweet_id is not None and tweet_id not in self.tweet_ids:
                             tweet = Tweet(
-                                card=card,
+                                data=card_data,
                                 driver=self.driver,
                                 actions=self.actions,
                                 scrape_poster_details=self.scraper_details[
@@ -463,6 +553,8 @@ It may be due to the following:
                                 if not tweet.error and tweet.tweet is not None:
                                     if not tweet.is_ad:
                                         self.data.append(tweet.tweet)
+                                        self.tweet_ids.add(tweet_id)
+                                        kept_ids.append(tweet_id)
                                         added_tweets += 1
                                         self.progress.print_progress(len(self.data), False, 0, no_tweets_limit)
 
@@ -483,6 +575,12 @@ It may be due to the following:
                 if len(self.data) >= self.max_tweets and not no_tweets_limit:
                     break
 
+                # Only kept tweets are skipped by the page from now on
+                mark_scraped(self.driver, kept_ids)
+
+                # Returns as soon as the timeline renders new cards instead of sleeping a fixed time
+                self.scroller.scroll_and_wait()
+
                 if added_tweets == 0:
                     # Check if there is a button "Retry" and click on it with a regular basis until a certain amount of tries
                     try:
@@ -506,12 +604,13 @@ It may be due to the following:
                             break
                         refresh_count += 1
                     empty_count += 1
-                    sleep(1)
                 else:
                     empty_count = 0
                     refresh_count = 0
             except StaleElementReferenceException:
-                sleep(2)
+                # The timeline re-rendered mid-pass; move on and wait for it to settle
+                # instead of re-reading the same page in a tight loop
+                self.scroller.scroll_and_wait()
                 continue
             except KeyboardInterrupt:
                 print("\n")
@@ -525,6 +624,8 @@ It may be due to the following:
 
         print("")
 
+        self.tweet_ids.save()
+
         if len(self.data) >= self.max_tweets or no_tweets_limit:
             print("Scraping Complete")
         else:
@@ -536,46 +637,7 @@ It may be due to the following:
         pass
 
     def save_to_csv(self):
-        print("Saving Tweets to CSV...")
-        now = datetime.now()
-        folder_path = "./tweets/"
-
-        if not os.path.exists(folder_path):
-            os.makedirs(folder_path)
-            print("Created Folder: {}".format(folder_path))
-
-        data = {
-            "Name": [tweet[0] for tweet in self.data],
-            "Handle": [tweet[1] for tweet in self.data],
-            "Timestamp": [tweet[2] for tweet in self.data],
-            "Verified": [tweet[3] for tweet in self.data],
-            "Content": [tweet[4] for tweet in self.data],
-            "Comments": [tweet[5] for tweet in self.data],
-            "Retweets": [tweet[6] for tweet in self.data],
-            "Likes": [tweet[7] for tweet in self.data],
-            "Analytics": [tweet[8] for tweet in self.data],
-            "Tags": [tweet[9] for tweet in self.data],
-            "Mentions": [tweet[10] for tweet in self.data],
-            "Emojis": [tweet[11] for tweet in self.data],
-            "Profile Image": [tweet[12] for tweet in self.data],
-            "Tweet Link": [tweet[13] for tweet in self.data],
-            "Tweet ID": [f"tweet_id:{tweet[14]}" for tweet in self.data],
-        }
-
-        if self.scraper_details["poster_details"]:
-            data["Tweeter ID"] = [f"user_id:{tweet[15]}" for tweet in self.data]
-            data["Following"] = [tweet[16] for tweet in self.data]
-            data["Followers"] = [tweet[17] for tweet in self.data]
-
-        df = pd.DataFrame(data)
-
-        current_time = now.strftime("%Y-%m-%d_%H-%M-%S")
-        file_path = f"{folder_path}{current_time}_tweets_1-{len(self.data)}.csv"
-        pd.set_option("display.max_colwidth", None)
-        df.to_csv(file_path, index=False, encoding="utf-8")
-
-        print("CSV Saved: {}".format(file_path))
-
+        save_tweets(self.data, self.scraper_details["poster_details"])
         pass
 
     def get_tweets(self):
@@ -1,7 +1,13 @@
+import os
+import sys
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import pandas as pd
-from pandas.tseries.frequencies import to_offset
+from tkinter import filedialog, messagebox, ttk
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from storage import load_table
+from background import run_in_background
+from intervals import fill_gaps
+from quality import check_frame, format_report
 
 class DataAnalyzerApp:
     def __init__(self, root):
@@ -21,8 +27,13 @@ class DataAnalyzerApp:
         title = tk.Label(self.upload_frame, text="Upload CSV File", font=("Arial", 16))
         title.pack(pady=10)
 
-        upload_button = tk.Button(self.upload_frame, text="Choose File", command=self.upload_file)
-        upload_button.pack(pady=10)
+        self.upload_button = tk.Button(self.upload_frame, text="Choose File", command=self.upload_file)
+        self.upload_button.pack(pady=10)
+
+        # Status line and progress bar for work running off the Tk thread, shared by both frames
+        self.status_label = tk.Label(self.root, text="")
+        self.status_label.pack(side="bottom", pady=5)
+        self.progress = ttk.Progressbar(self.root, mode="indeterminate", length=300)
 
     def init_result_frame(self):
         self.result_frame = tk.Frame(self.root)
@@ -44,112 +55,98 @@ class DataAnalyzerApp:
         self.issues_scroll.grid(row=1, column=1, sticky='ns')
 
         # Remove duplicates button
-        remove_duplicates_button = tk.Button(self.result_frame, text="Remove Duplicates", command=self.remove_duplicates)
-        remove_duplicates_button.grid(row=2, column=0, pady=10)
+        self.remove_duplicates_button = tk.Button(self.result_frame, text="Remove Duplicates", command=self.remove_duplicates)
+        self.remove_duplicates_button.grid(row=2, column=0, pady=10)
+
+        # Fill gaps button
+        self.fill_gaps_button = tk.Button(self.result_frame, text="Fill Gaps", command=self.fill_gaps)
+        self.fill_gaps_button.grid(row=3, column=0, pady=10)
 
         # Back button
-        back_button = tk.Button(self.result_frame, text="Back", command=self.back_to_upload)
-        back_button.grid(row=3, column=0, pady=10)
+        self.back_button = tk.Button(self.result_frame, text="Back", command=self.back_to_upload)
+        self.back_button.grid(row=4, column=0, pady=10)
+
+        # Disabled while a background job could still replace the data they act on
+        self.action_buttons = [self.upload_button, self.remove_duplicates_button, self.fill_gaps_button, self.back_button]
 
     def upload_file(self):
-        file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+        file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("Parquet files", "*.parquet"), ("Feather files", "*.feather")])
         if file_path:
             self.file_name = file_path.split("/")[-1]  # Extract the file name from the path
-            try:
-                self.df = pd.read_csv(file_path, parse_dates=['Open Time'])
-                self.analyze_data()
-                self.show_result_frame()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load file: {e}")
-
-    def analyze_data(self):
-        # Basic Descriptive Statistics
-        num_rows = len(self.df)
-        missing_values = self.df.isnull().sum().sum()
-        unique_rows = len(self.df.drop_duplicates())
-        duplicate_rows = num_rows - unique_rows
-        negative_values = (self.df.select_dtypes(include=['number']) < 0).sum().sum()
-
-        # Sort data by 'Open Time' and detect missing time intervals
-        data_sorted = self.df.sort_values(by='Open Time').reset_index(drop=True)
-
-        # Determine the expected time frequency
-        time_diffs = data_sorted['Open Time'].diff().dropna()  # Calculate time differences between consecutive timestamps
-        min_time_diff = time_diffs.min() if not time_diffs.empty else pd.Timedelta(0)  # Avoid empty min error
-
-        # Detect the closest standard frequency
-        if min_time_diff <= pd.Timedelta(hours=1):
-            expected_freq = '1H'
-        elif min_time_diff <= pd.Timedelta(hours=4):
-            expected_freq = '4H'
-        elif min_time_diff <= pd.Timedelta(days=1):
-            expected_freq = '1D'
-        else:
-            expected_freq = min_time_diff  # Fallback if an unsupported interval is detected
-
-        # Calculate gaps based on the detected frequency
-        expected_timedelta = pd.Timedelta(to_offset(expected_freq).nanos, unit='ns')
-
-        # Ensure `time_diffs` and its length matches the DataFrame
-        missing_dates = (time_diffs > expected_timedelta).sum()
-        is_ascending = data_sorted['Open Time'].is_monotonic_increasing
-        duplicate_timestamps = self.df['Open Time'].duplicated().sum()
-        unique_timestamps = num_rows - duplicate_timestamps
-
-        # Identify the row indices where the gaps occur
-        gap_indices = time_diffs.index[time_diffs > expected_timedelta].tolist()  # Index of time_diffs directly
-        gap_indices_display = [i + 2 for i in gap_indices]  # Adjust for 0-based indexing
-
-        # Identify rows with issues
-        missing_rows = self.df[self.df.isnull().any(axis=1)].index.tolist()
-        duplicate_row_indices = self.df[self.df.duplicated(keep=False)].index.tolist()
-        negative_row_indices = self.df[(self.df.select_dtypes(include=['number']) < 0).any(axis=1)].index.tolist()
-
-        missing_rows_display = [i + 2 for i in missing_rows]  # Adjust for 0-based indexing
-        duplicate_row_indices_display = [i + 2 for i in duplicate_row_indices]
-        negative_row_indices_display = [i + 2 for i in negative_row_indices]
-
-        # Store results for display
-        self.stats_text = (
-            f"File Name: {self.file_name}\n"
-            f"Total Rows: {num_rows}\n"
-            f"Missing Values (total): {missing_values}\n"
-            f"Unique Rows: {unique_rows}\n"
-            f"Duplicate Rows: {duplicate_rows}\n"
-            f"Negative Values (numeric columns): {negative_values}\n"
-            f"Expected Interval: {expected_freq}\n"
-            f"Missing Date Gaps: {missing_dates} (gaps in 'Open Time')\n"
-            f"Is 'Open Time' in Ascending Order: {'Yes' if is_ascending else 'No'}\n"
-            f"Duplicate Timestamps: {duplicate_timestamps} (out of {num_rows})\n"
-            f"Unique Timestamps: {unique_timestamps}\n"
-        )
-        self.issues_text = (
-            f"Row Numbers with Missing Values: {missing_rows_display}\n"
-            f"Row Numbers with Duplicate Entries: {duplicate_row_indices_display}\n"
-            f"Row Numbers with Negative Values: {negative_row_indices_display}\n"
-            f"Rows with Missing Date Gaps: {gap_indices_display}\n"
-        )    
-    def remove_duplicates(self):
-        # Only keep the first occurrence of each duplicate, remove subsequent duplicates
-        initial_rows = len(self.df)
-        self.df = self.df[self.df.duplicated(keep='first') == False]
-        final_rows = len(self.df)
-        duplicates_removed = initial_rows - final_rows
-
-        # Save the updated DataFrame back to the CSV file
+            # Reading and checking a large file takes a while; the window stays responsive meanwhile
+            self.set_busy(f"Loading and analyzing {self.file_name}...")
+            run_in_background(self.root, lambda: self.analyze_data(load_table(file_path)), self.load_finished, self.job_failed)
+
+    def load_finished(self, result):
+        self.clear_busy()
+        self.df, self.report, self.stats_text, self.issues_text = result
+        self.show_result_frame()
+
+    def job_failed(self, error):
+        self.clear_busy()
+        messagebox.showerror("Error", f"Failed to process file: {error}")
+
+    def set_busy(self, message):
+        for button in self.action_buttons:
+            button.config(state=tk.DISABLED)
+        self.status_label.config(text=message)
+        self.progress.pack(side="bottom", pady=5)
+        self.progress.start(10)
+
+    def clear_busy(self):
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.status_label.config(text="")
+        for button in self.action_buttons:
+            button.config(state=tk.NORMAL)
+
+    # Worker-thread side of every job: checks df and returns it with its report, touching no
+    # widget and no attribute the Tk thread reads
+    def analyze_data(self, df):
+        # Single vectorized pass; issue rows come back as compact ranges
+        report = check_frame(df, self.file_name)
+        stats_text, issues_text = format_report(report)
+        return df, report, stats_text, issues_text
+
+    # Replace the data with a cleaned copy, save it if a path was chosen, and redisplay its report
+    def run_cleanup(self, message, clean, done_message):
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
-        if file_path:
-            self.df.to_csv(file_path, index=False)
-            messagebox.showinfo("Info", f"Removed {duplicates_removed} duplicate rows and saved to {file_path}.")
+        df = self.df
 
-        # Update analysis after removing duplicates
-        self.analyze_data()
+        def work():
+            cleaned = clean(df)
+            if file_path:
+                cleaned.to_csv(file_path, index=False)
+            return self.analyze_data(cleaned)
 
-        # Update display
-        self.stats_text_widget.delete(1.0, tk.END)
-        self.issues_text_widget.delete(1.0, tk.END)
-        self.stats_text_widget.insert(tk.END, self.stats_text)
-        self.issues_text_widget.insert(tk.END, self.issues_text) 
+        def finished(result):
+            previous_rows = len(df)
+            self.load_finished(result)
+            if file_path:
+                messagebox.showinfo("Info", done_message(previous_rows, len(self.df)) + f" and saved to {file_path}.")
+
+        self.set_busy(message)
+        run_in_background(self.root, work, finished, self.job_failed)
+
+    def remove_duplicates(self):
+        # Only keep the first occurrence of each duplicate, remove subsequent duplicates
+        self.run_cleanup(
+            "Removing duplicates...",
+            lambda df: df[df.duplicated(keep='first') == False],
+            lambda before, after: f"Removed {before - after} duplicate rows",
+        )
+
+    def fill_gaps(self):
+        # Reindex onto a complete grid at the detected interval, forward-filling the missing bars
+        if not self.report['interval_ns']:
+            messagebox.showinfo("Info", "No regular interval detected; nothing to fill.")
+            return
+        report = self.report
+        self.run_cleanup(
+            f"Filling missing {report['expected_interval']} bars...",
+            lambda df: fill_gaps(df, report['time_column'], report['interval_ns']),
+            lambda before, after: f"Filled {after - report['unique_timestamps']} missing {report['expected_interval']} bars",
+        )
 
     def show_result_frame(self):
         # Update text widgets with results
@@ -0,0 +1,287 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from storage import ColumnarStorage, load_table
+from intervals import fill_gaps, find_gaps, infer_interval_ns, interval_label
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DATA_DIR = os.path.join(BASE_DIR, "Correct_Price_Data")
+DATA_DIRS = [
+    DATA_DIR,
+    os.path.join(BASE_DIR, "Correct_Open_Interest-Data"),
+    os.path.join(BASE_DIR, "Price_&_OpenInterest_Data"),
+]
+
+CHUNK_ROWS = 500_000  # Rows parsed per CSV chunk; only compact per-row arrays are kept between chunks
+
+
+# Collapse a boolean row mask into [first, last] runs, as file line numbers (line 1 is the header)
+def issue_ranges(mask, offset=2):
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return [[int(start) + offset, int(end) + offset - 1] for start, end in zip(edges[::2], edges[1::2])]
+
+def format_ranges(ranges):
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges) or "None"
+
+# Stream a file as DataFrames: CSV in chunks, columnar formats in one piece
+def iter_chunks(path, chunksize=CHUNK_ROWS):
+    if path.lower().endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunksize)
+    else:
+        yield load_table(path)
+
+# Reduce one chunk to per-row arrays: a 64-bit fingerprint of the whole row, null/negative
+# flags, the number of negative cells and the candle time as int64 nanoseconds
+def scan_chunk(chunk, time_column):
+    times = pd.to_datetime(chunk[time_column], errors='coerce')
+    numeric = chunk.drop(columns=[time_column]).select_dtypes(include='number').astype('float64')
+
+    # Hash a normalised frame so the same row fingerprints identically in every chunk,
+    # whatever dtype pandas inferred for that chunk
+    normalised = chunk.drop(columns=numeric.columns.tolist() + [time_column]).astype(str)
+    normalised[time_column] = times
+    normalised[numeric.columns] = numeric
+    fingerprints = pd.util.hash_pandas_object(normalised, index=False).to_numpy()
+
+    nulls = chunk.isna().to_numpy()
+    negatives = numeric.to_numpy() < 0
+    return {
+        'fingerprints': fingerprints,
+        'times': times.to_numpy(dtype='datetime64[ns]').astype('int64'),
+        'valid_times': times.notna().to_numpy(),
+        'null_rows': nulls.any(axis=1),
+        'missing_values': int(nulls.sum()),
+        'negative_rows': negatives.any(axis=1),
+        'negative_values': int(negatives.sum()),
+    }
+
+# One pass over a file's chunks; every check runs on the concatenated per-row arrays
+def check_chunks(chunks, name):
+    parts = []
+    time_column = None
+    for chunk in chunks:
+        time_column = time_column or chunk.columns[0]  # 'Open Time', 'timestamp' or 'Time'
+        parts.append(scan_chunk(chunk, time_column))
+
+    merged = {key: np.concatenate([part[key] for part in parts]) for key in ('fingerprints', 'times', 'valid_times', 'null_rows', 'negative_rows')}
+    num_rows = len(merged['fingerprints'])
+
+    # Duplicate rows: every row whose fingerprint occurs more than once
+    _, row_inverse, row_counts = np.unique(merged['fingerprints'], return_inverse=True, return_counts=True)
+    duplicate_mask = row_counts[row_inverse] > 1
+    unique_rows = len(row_counts)
+
+    # Time checks on the valid timestamps, in time order, mapped back to file rows
+    valid_rows = np.flatnonzero(merged['valid_times'])
+    times = merged['times'][valid_rows]
+    order = np.argsort(times, kind='stable')
+    sorted_times = times[order]
+
+    # The interval is the most common spacing, so 5m and 15m series are told apart exactly
+    interval_ns = infer_interval_ns(sorted_times)
+    gap_positions, missing_bars = find_gaps(sorted_times, interval_ns)
+    gap_mask = np.zeros(num_rows, dtype=bool)
+    gap_mask[valid_rows[order[gap_positions + 1]]] = True
+
+    duplicate_timestamps = int(times.size - np.unique(times).size)
+
+    return {
+        'file': name,
+        'time_column': time_column,
+        'rows': num_rows,
+        'missing_values': sum(part['missing_values'] for part in parts),
+        'unique_rows': unique_rows,
+        'duplicate_rows': num_rows - unique_rows,
+        'negative_values': sum(part['negative_values'] for part in parts),
+        'expected_interval': interval_label(interval_ns),
+        'interval_ns': interval_ns,
+        'missing_date_gaps': int(gap_positions.size),
+        'missing_bars': missing_bars,
+        'ascending': bool(np.all(np.diff(times) >= 0)),
+        'duplicate_timestamps': duplicate_timestamps,
+        'unique_timestamps': num_rows - duplicate_timestamps,
+        'missing_value_rows': issue_ranges(merged['null_rows']),
+        'duplicate_row_ranges': issue_ranges(duplicate_mask),
+        'negative_value_rows': issue_ranges(merged['negative_rows']),
+        'gap_rows': issue_ranges(gap_mask),
+    }
+
+def check_frame(df, name=""):
+    return check_chunks([df], name)
+
+def check_file(path, chunksize=CHUNK_ROWS):
+    return check_chunks(iter_chunks(path, chunksize), data_name(path))
+
+# Text for the analyzer window: (statistics, issue rows)
+def format_report(report):
+    stats_text = (
+        f"File Name: {report['file']}\n"
+        f"Total Rows: {report['rows']}\n"
+        f"Missing Values (total): {report['missing_values']}\n"
+        f"Unique Rows: {report['unique_rows']}\n"
+        f"Duplicate Rows: {report['duplicate_rows']}\n"
+        f"Negative Values (numeric columns): {report['negative_values']}\n"
+        f"Expected Interval: {report['expected_interval']}\n"
+        f"Missing Date Gaps: {report['missing_date_gaps']} ({report['missing_bars']} bars missing in '{report['time_column']}')\n"
+        f"Is '{report['time_column']}' in Ascending Order: {'Yes' if report['ascending'] else 'No'}\n"
+        f"Duplicate Timestamps: {report['duplicate_timestamps']} (out of {report['rows']})\n"
+        f"Unique Timestamps: {report['unique_timestamps']}\n"
+    )
+    issues_text = (
+        f"Row Numbers with Missing Values: {format_ranges(report['missing_value_rows'])}\n"
+        f"Row Numbers with Duplicate Entries: {format_ranges(report['duplicate_row_ranges'])}\n"
+        f"Row Numbers with Negative Values: {format_ranges(report['negative_value_rows'])}\n"
+        f"Rows with Missing Date Gaps: {format_ranges(report['gap_rows'])}\n"
+    )
+    return stats_text, issues_text
+
+# A series written by ColumnarStorage: a .../symbol=X/interval=Y directory of month=YYYY-MM partitions
+def is_series_dir(path):
+    return os.path.isdir(path) and bool(partition_files(path))
+
+def partition_files(series_dir):
+    return sorted(glob.glob(os.path.join(series_dir, "month=*", "*.parquet")) + glob.glob(os.path.join(series_dir, "month=*", "*.feather")))
+
+# File name, or symbol=X/interval=Y for a partitioned series
+def data_name(path):
+    if os.path.isdir(path):
+        path = os.path.normpath(path)
+        return f"{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}"
+    return os.path.basename(path)
+
+# Files and partitioned series to check: single files, and in directories the top-level files
+# plus every partitioned series below them, each series loaded as one table
+def data_files(paths):
+    files = []
+    for path in paths:
+        if is_series_dir(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.csv")) + glob.glob(os.path.join(path, "*.parquet")) + glob.glob(os.path.join(path, "*.feather"))))
+            files.extend(sorted(d for d in glob.glob(os.path.join(path, "**", "interval=*"), recursive=True) if is_series_dir(d)))
+        else:
+            files.append(path)
+    return files
+
+# Rewrite a file without its repeated rows, keeping the first occurrence of each; returns rows removed
+def dedupe_file(path, chunksize=CHUNK_ROWS):
+    if os.path.isdir(path):
+        # Identical rows share a timestamp and so a month; each partition is deduped on its own
+        return sum(dedupe_file(file_path, chunksize) for file_path in partition_files(path))
+
+    chunks = list(iter_chunks(path, chunksize))
+    time_column = chunks[0].columns[0]
+    fingerprints = np.concatenate([scan_chunk(chunk, time_column)['fingerprints'] for chunk in chunks])
+    _, first_rows = np.unique(fingerprints, return_index=True)
+    keep = np.zeros(len(fingerprints), dtype=bool)
+    keep[first_rows] = True
+    removed = int((~keep).sum())
+    if removed == 0:
+        return 0
+
+    temp_path = path + ".tmp"
+    if path.lower().endswith(".csv"):
+        # Drop the raw lines so every kept row stays byte-for-byte as it was
+        with open(path, 'rb') as file:
+            lines = file.read().splitlines(keepends=True)
+        data_lines = [line for line in lines[1:] if line.strip()]
+        if len(data_lines) != len(keep):
+            raise ValueError(f"{path}: {len(data_lines)} lines but {len(keep)} parsed rows, not rewriting")
+        with open(temp_path, 'wb') as file:
+            file.write(lines[0])
+            file.writelines(line for line, kept in zip(data_lines, keep) if kept)
+    else:
+        df = pd.concat(chunks, ignore_index=True)[keep].reset_index(drop=True)
+        if path.lower().endswith(".parquet"):
+            df.to_parquet(temp_path, index=False)
+        else:
+            df.to_feather(temp_path)
+    os.replace(temp_path, path)
+    return removed
+
+# Write a copy of the file onto a complete regular grid, forward-filling missing bars; returns bars added
+def fill_file(path, output_dir, interval_ns=None):
+    df = load_table(path)
+    time_column = df.columns[0]
+    filled = fill_gaps(df, time_column, interval_ns)
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, os.path.basename(path))
+    if os.path.isdir(path):
+        # Same symbol=/interval=/month= layout and format under output_dir
+        symbol = os.path.basename(os.path.dirname(os.path.normpath(path))).split("=", 1)[1]
+        interval = output_path.split("=", 1)[1]
+        file_format = "feather" if partition_files(path)[0].endswith(".feather") else "parquet"
+        ColumnarStorage(output_dir, time_column, file_format=file_format).write(filled, symbol, interval)
+    elif path.lower().endswith(".parquet"):
+        filled.to_parquet(output_path, index=False)
+    elif path.lower().endswith(".feather"):
+        filled.to_feather(output_path)
+    else:
+        filled.to_csv(output_path, index=False)
+    return len(filled) - pd.to_datetime(df[time_column], errors='coerce').nunique()
+
+# Worker for the batch run: check one file, optionally dedupe it in place and write a gap-filled copy
+def process_file(path, chunksize=CHUNK_ROWS, dedupe=False, fill_dir=None):
+    report = check_file(path, chunksize)
+    report['path'] = os.path.relpath(path, BASE_DIR)
+    report['duplicates_removed'] = dedupe_file(path, chunksize) if dedupe and report['duplicate_rows'] else 0
+    report['bars_filled'] = fill_file(path, fill_dir, report['interval_ns']) if fill_dir and report['interval_ns'] else 0
+    return report
+
+def has_issues(report):
+    return any(report[key] for key in ('duplicate_rows', 'missing_values', 'negative_values', 'missing_date_gaps', 'duplicate_timestamps')) or not report['ascending']
+
+# One consolidated report for every file: JSON as written, Parquet with the ranges stored as JSON strings
+def write_report(reports, report_path):
+    if report_path.lower().endswith(".parquet"):
+        range_keys = ('missing_value_rows', 'duplicate_row_ranges', 'negative_value_rows', 'gap_rows')
+        rows = [{key: json.dumps(value) if key in range_keys else value for key, value in report.items()} for report in reports]
+        pd.DataFrame(rows).to_parquet(report_path, index=False)
+    else:
+        with open(report_path, 'w') as file:
+            json.dump({'generated': pd.Timestamp.now(tz='UTC').isoformat(), 'files': reports}, file, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check price and open interest files for duplicates, missing values, negatives and time gaps.")
+    parser.add_argument("paths", nargs="*", default=DATA_DIRS, help="Files or directories to check (default: Correct_Price_Data, Correct_Open_Interest-Data and Price_&_OpenInterest_Data).")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="Rows parsed per CSV chunk.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--report", type=str, default=None, help="Write a consolidated report to this .json or .parquet file.")
+    parser.add_argument("--dedupe", action="store_true", help="Remove repeated rows from the files in place, keeping the first occurrence.")
+    parser.add_argument("--fill-gaps", type=str, default=None, metavar="DIR", help="Write copies reindexed to a complete regular grid, missing bars forward-filled, into this directory.")
+    parser.add_argument("--fail-on-issues", action="store_true", help="Exit with status 1 if any file has issues, for unattended runs.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files = data_files(args.paths)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        reports = list(executor.map(process_file, files, [args.chunksize] * len(files), [args.dedupe] * len(files), [args.fill_gaps] * len(files)))
+
+    for report in reports:
+        print(
+            f"{report['path']}: {report['rows']} rows, {report['duplicate_rows']} duplicate rows, "
+            f"{report['missing_values']} missing values, {report['negative_values']} negative values, "
+            f"{report['missing_date_gaps']} gaps ({report['missing_bars']} bars) at {report['expected_interval']}"
+            + (f", {report['duplicates_removed']} duplicates removed" if report['duplicates_removed'] else "")
+            + (f", {report['bars_filled']} bars filled" if report['bars_filled'] else "")
+        )
+    print(f"Checked {len(files)} files in {time.perf_counter() - start:.2f} s")
+
+    if args.report:
+        write_report(reports, args.report)
+        print(f"Report written to {args.report}")
+
+    if args.fail_on_issues and any(has_issues(report) for report in reports):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()